@@ -0,0 +1,285 @@
+"""
+Fake Slack Web API server w/ configurable latency and HTTP 429 injection \n
+Serves methods used by the bot, every posted message is kept in per channel queues,
+so load generator can wait for bot replies \n
+Standalone run (point the bot to it w/ SLACK_API_URL=http://localhost:8090/api/):
+    python -m benchmarks.fake_slack --port 8090 --latency-ms 50 --rate-429 0.01
+"""
+
+from __future__ import annotations
+
+from argparse import ArgumentParser
+from asyncio import Queue, sleep
+from collections import Counter, defaultdict
+from itertools import count
+from random import Random
+from time import time
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+from aiohttp import web
+
+BOT_USER_ID = "UBOT00001"
+TEAM_ID = "T0FAKE001"
+
+Handler = Callable[[dict], Awaitable[dict]]
+
+
+class PostedMessage(NamedTuple):
+    """
+    Message received by chat.postMessage or chat.postEphemeral
+    """
+
+    method: str
+    channel: str
+    user: Optional[str]
+    text: str
+    received_at: float
+
+
+class FakeSlack:
+    """
+    In-memory Slack workspace behind aiohttp server
+    """
+
+    def __init__(
+            self,
+            latency_ms: float = 0.0,
+            jitter_ms: float = 0.0,
+            rate_429: float = 0.0,
+            retry_after: int = 1,
+            seed: int = 0,
+    ) -> None:
+        """
+        :param latency_ms: Base latency of every response
+        :param jitter_ms: Max random latency added to the base one
+        :param rate_429: Probability of HTTP 429 response
+        :param retry_after: Retry-After header of HTTP 429 responses
+        :param seed: Random seed for jitter & 429 injection
+        """
+
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+
+        self._rng = Random(seed)
+        self._ts = count(1)
+
+        # Workspace state
+        self.channel_members: dict[str, list[str]] = defaultdict(list)
+        self.emoji: dict[str, str] = {f"fake_emoji_{n}": f"https://emoji.invalid/{n}.png" for n in range(100)}
+
+        # Posted messages by channel (DM channel id is "D" + user id)
+        self.messages: dict[str, Queue[PostedMessage]] = defaultdict(Queue)
+        self.ephemeral: dict[tuple[str, str], Queue[PostedMessage]] = defaultdict(Queue)
+
+        self.calls: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+
+        self._methods: dict[str, Handler] = {
+            "auth.test": self.auth_test,
+            "users.info": self.users_info,
+            "dnd.info": self.dnd_info,
+            "dnd.teamInfo": self.dnd_team_info,
+            "conversations.open": self.conversations_open,
+            "conversations.info": self.conversations_info,
+            "conversations.members": self.conversations_members,
+            "chat.postMessage": self.chat_post_message,
+            "chat.postEphemeral": self.chat_post_ephemeral,
+            "emoji.list": self.emoji_list,
+        }
+
+    @staticmethod
+    def dm_channel(
+            user_id: str,
+    ) -> str:
+        return "D" + user_id[1:]
+
+    def next_ts(self) -> str:
+        return f"{int(time())}.{next(self._ts):06d}"
+
+    # --- Web API methods ---
+
+    async def auth_test(self, params: dict) -> dict:
+        return dict(user_id=BOT_USER_ID, bot_id="BBOT00001", team_id=TEAM_ID, team="Fake", user="dailynator")
+
+    async def users_info(self, params: dict) -> dict:
+        user_id = params["user"]
+
+        return dict(
+            user=dict(
+                id=user_id,
+                real_name=f"Fake {user_id}",
+                tz="UTC",
+                is_bot=user_id == BOT_USER_ID,
+                profile=dict(
+                    real_name=f"Fake {user_id}",
+                    image_48=f"https://avatars.invalid/{user_id}.png",
+                ),
+            )
+        )
+
+    async def dnd_info(self, params: dict) -> dict:
+        return dict(dnd_enabled=False, next_dnd_start_ts=time() + 86400, next_dnd_end_ts=time() + 90000)
+
+    async def dnd_team_info(self, params: dict) -> dict:
+        return dict(
+            users={
+                user_id: dict(dnd_enabled=False, next_dnd_start_ts=time() + 86400, next_dnd_end_ts=time() + 90000)
+                for user_id in params.get("users", "").split(",") if user_id
+            }
+        )
+
+    async def conversations_open(self, params: dict) -> dict:
+        return dict(channel=dict(id=self.dm_channel(params["users"].split(",")[0])))
+
+    async def conversations_info(self, params: dict) -> dict:
+        return dict(channel=dict(id=params["channel"], name=f"fake-{params['channel'].lower()}"))
+
+    async def conversations_members(self, params: dict) -> dict:
+        members = self.channel_members[params["channel"]]
+
+        start = int(params.get("cursor") or 0)
+        end = start + int(params.get("limit") or 100)
+
+        return dict(
+            members=members[start:end],
+            response_metadata=dict(next_cursor=str(end) if end < len(members) else ""),
+        )
+
+    async def chat_post_message(self, params: dict) -> dict:
+        ts = self.next_ts()
+
+        self.messages[params["channel"]].put_nowait(
+            PostedMessage(
+                method="chat.postMessage",
+                channel=params["channel"],
+                user=None,
+                text=params.get("text", ""),
+                received_at=time(),
+            )
+        )
+
+        return dict(channel=params["channel"], ts=ts, message=dict(text=params.get("text", ""), ts=ts))
+
+    async def chat_post_ephemeral(self, params: dict) -> dict:
+        self.ephemeral[(params["channel"], params["user"])].put_nowait(
+            PostedMessage(
+                method="chat.postEphemeral",
+                channel=params["channel"],
+                user=params["user"],
+                text=params.get("text", ""),
+                received_at=time(),
+            )
+        )
+
+        return dict(message_ts=self.next_ts())
+
+    async def emoji_list(self, params: dict) -> dict:
+        return dict(emoji=self.emoji)
+
+    # --- HTTP ---
+
+    async def handle(
+            self,
+            request: web.Request,
+    ) -> web.Response:
+        api_method = request.match_info["method"]
+
+        # slack_sdk sends params as query string, form data or json body
+        params = dict(request.query)
+
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            params.update(await request.post())
+
+        self.calls[api_method] += 1
+
+        delay = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+        if delay:
+            await sleep(delay / 1000)
+
+        if self.rate_429 and self._rng.random() < self.rate_429:
+            self.rate_limited[api_method] += 1
+
+            return web.json_response(
+                dict(ok=False, error="ratelimited"),
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+
+        method = self._methods.get(api_method)
+
+        if method is None:
+            return web.json_response(dict(ok=False, error="unknown_method"))
+
+        return web.json_response(dict(ok=True, **await method(params)))
+
+    def application(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/api/{method}", self.handle)
+
+        return app
+
+    async def start(
+            self,
+            host: str = "127.0.0.1",
+            port: int = 0,
+    ) -> tuple[web.AppRunner, str]:
+        """
+        Start server in the running loop
+            :param host: Bind host
+            :param port: Bind port (0 to pick a free one)
+            :return: Runner (for cleanup) & Web API base url
+        """
+
+        runner = web.AppRunner(self.application())
+        await runner.setup()
+
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+
+        bound_port = site._server.sockets[0].getsockname()[1]  # noqa
+
+        return runner, f"http://{host}:{bound_port}/api/"
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """
+        Get served calls & injected 429 by method
+            :return: Dict w/ calls and rate_limited counters
+        """
+
+        return dict(
+            calls=dict(self.calls),
+            rate_limited=dict(self.rate_limited),
+        )
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Fake Slack Web API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency of every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Max random latency added to the base one")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Probability of HTTP 429 response")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of HTTP 429 responses")
+    parser.add_argument("--members", type=int, default=0, help="Members of every channel (fake users U00000000...)")
+    args = parser.parse_args()
+
+    fake_slack = FakeSlack(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+    )
+
+    # Every channel has the same members in standalone mode
+    members = [f"U{n:08d}" for n in range(args.members)] + [BOT_USER_ID]
+    fake_slack.channel_members.default_factory = lambda: list(members)
+
+    web.run_app(fake_slack.application(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
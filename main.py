@@ -1,43 +1,130 @@
 """Daily bot main file"""
 
 from asyncio import run
+from multiprocessing import get_context
 
-from os import getenv
-from logging import basicConfig, DEBUG, WARNING, getLogger, FileHandler, StreamHandler
+from os import getenv, environ, path
+from logging import basicConfig, DEBUG, WARNING, getLogger, Formatter, LogRecord, StreamHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from queue import SimpleQueue
+from atexit import register as register_atexit
 
 from slack_bolt.async_app import AsyncApp
-from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_bolt.logger.messages import warning_client_prioritized_and_token_skipped
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.jobstores.base import BaseJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from datetime import datetime
 from src.utils import start_cron
+from src.dispatcher import DispatchingWebClient
+from src.sharding import worker_count, worker_index, FireTimeExecutor
+from src.ingress import create_socket_mode_handler
 
-log_name = ".daily_bot_logs"
+# Every worker rotates its own file
+log_name = f".daily_bot_logs.{worker_index}" if worker_count > 1 else ".daily_bot_logs"
+
+log_formatter = Formatter(
+    fmt="%(asctime)s | %(levelname)s | %(message)s",  # noqa
+    datefmt="%H:%M:%S",
+)
+
+# Log I/O is done by listener thread, event loop only puts records to the queue
+log_queue = SimpleQueue()
+
+log_handlers = [
+    RotatingFileHandler(
+        filename=log_name,
+        maxBytes=int(getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)),
+        backupCount=int(getenv("LOG_BACKUP_COUNT", 5)),
+    ),
+    StreamHandler(),
+]
+
+for log_handler in log_handlers:
+    log_handler.setFormatter(log_formatter)
+
+log_listener = QueueListener(
+    log_queue,
+    *log_handlers,
+    respect_handler_level=True,
+)
+
+# Records are formatted once on the listener side
+queue_handler = QueueHandler(log_queue)
+queue_handler.setFormatter(Formatter("%(message)s"))
 
 # Establish logging level
 basicConfig(
-    format="%(asctime)s | %(levelname)s | %(message)s",  # noqa
-    datefmt="%H:%M:%S",
     level=DEBUG if getenv("DEVELOPMENT", "").lower() == "true" else WARNING,
     handlers=[
-        FileHandler(
-            filename=log_name,
-        ),
-        StreamHandler(),
+        queue_handler,
     ]
 )
 
+log_listener.start()
+
+# Flush queued records on exit
+register_atexit(log_listener.stop)
+
 logger = getLogger()
 
-# Async App instance
+# Bolt reads SLACK_BOT_TOKEN on its own and warns that the client's token wins (it is the same token)
+def skip_token_warning(record: LogRecord) -> bool:
+    return record.getMessage() != warning_client_prioritized_and_token_skipped()
+
+
+logger.addFilter(skip_token_warning)
+
+# Async App instance (all Web API calls go through rate limit aware dispatcher)
 app = AsyncApp(
     logger=logger,
+    client=DispatchingWebClient(
+        token=getenv("SLACK_BOT_TOKEN"),
+        base_url=getenv("SLACK_API_URL", DispatchingWebClient.BASE_URL),
+        logger=logger,
+    ),
 )
 
+logger.removeFilter(skip_token_warning)
+
+# Every worker keeps jobs of its own channels only (SCHEDULER_JOBSTORE_DIR is a mounted volume in docker-compose.yml)
+jobstore_name = f".daily_bot_jobs.{worker_index}.sqlite" if worker_count > 1 else ".daily_bot_jobs.sqlite"
+jobstore_path = path.join(getenv("SCHEDULER_JOBSTORE_DIR", "."), jobstore_name)
+
+
+def create_job_store() -> BaseJobStore:
+    """
+    Create persistent scheduler job store \n
+    SCHEDULER_JOBSTORE_URL may point to any sync SQLAlchemy database (e.g. postgresql+psycopg2://...)
+    or be set to "memory" to disable persistence
+        :return: Job store instance
+    """
+
+    jobstore_url = getenv("SCHEDULER_JOBSTORE_URL", f"sqlite:///{jobstore_path}")
+
+    if jobstore_url == "memory":
+        return MemoryJobStore()
+
+    return SQLAlchemyJobStore(
+        url=jobstore_url,
+        tablename="apscheduler_jobs",
+    )
+
+
 # Async scheduler instance
 scheduler = AsyncIOScheduler(
     timezone=datetime.now().astimezone().tzinfo,
     logger=logger,
+    jobstores={
+        "default": create_job_store(),
+        # Periodic jobs are re-added on start, so they're kept in memory (sync job store isn't touched every minute)
+        "internal": MemoryJobStore(),
+    },
+    executors={
+        "default": FireTimeExecutor(),
+    },
 )
 
 
@@ -52,22 +139,71 @@ async def main() -> None:
     # Create database connection
     await Database().connect()
 
-    # Get SocketHandler
-    handler = AsyncSocketModeHandler(
+    # Get SocketHandler (envelopes are acked on arrival and processed by a worker pool)
+    handler = create_socket_mode_handler(
         app=listeners.app,
         logger=logger,
     )
 
+    # Export hot path metrics & current stats of pools, queues and caches on /metrics
+    from src.metrics import registry, start_metrics_server
+    from src.dispatcher import dispatcher
+    from src.profiles import profile_cache_stats
+    from src.db import question_cache
+
+    registry.register_gauges("dailynator_db_pool", "Database connection pool usage", Database().pool_stats)
+    registry.register_gauges("dailynator_slack_dispatcher", "Slack dispatcher queues & throttling", dispatcher.stats)
+    registry.register_gauges("dailynator_ingress", "Socket Mode ingress queues", handler.stats)
+    registry.register_gauges("dailynator_profile_cache", "User profile cache usage", profile_cache_stats)
+    registry.register_gauges("dailynator_question_cache", "Question set cache usage", question_cache.stats)
+
+    await start_metrics_server()
+
     # Initialize cron
     await start_cron()
 
+    # Load emoji catalog & keep it fresh if avatars aren't used
+    if getenv("USE_AVATARS", "").lower() == "false":
+        from src.emoji_catalog import emoji_catalog
+
+        emoji_catalog.start(
+            client=app.client,
+        )
+
     # Start server
     await handler.start_async()
 
 
-if __name__ == "__main__":
+def run_worker() -> None:
+    """
+    Launches the bot in a separate worker process
+    """
+
     run(main())
 
+
+if __name__ == "__main__":
+    # Spawn a process per shard unless index is set explicitly (e.g. one container per worker)
+    if worker_count > 1 and "BOT_WORKER_INDEX" not in environ:
+        # Spawned (not forked) workers import modules from scratch and read their own index
+        spawn = get_context("spawn")
+        workers = list()
+
+        for index in range(worker_count):
+            environ["BOT_WORKER_INDEX"] = str(index)
+
+            worker = spawn.Process(
+                target=run_worker,
+                name=f"daily-bot-worker-{index}",
+            )
+            worker.start()
+            workers.append(worker)
+
+        for worker in workers:
+            worker.join()
+    else:
+        run(main())
+
 # TODO: add change my report button in end daily block
 # TODO: add use last, skip, out of office in start daily block
 # TODO add /show_unanswered_users
@@ -0,0 +1,58 @@
+"""hot_path_indexes
+
+Revision ID: 3d8f0a6c2e91
+Revises: 9c2e4b7d1a53
+Create Date: 2026-10-17 23:02:37.524119
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from typing import Optional
+
+
+# revision identifiers, used by Alembic.
+revision = '3d8f0a6c2e91'
+down_revision = '9c2e4b7d1a53'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, referred column) of every foreign key
+foreign_keys = [
+    ('questions', 'channel_id', 'channels', 'channel_id'),
+    ('users', 'main_channel_id', 'channels', 'channel_id'),
+    ('answers', 'user_id', 'users', 'user_id'),
+    ('answers', 'question_id', 'questions', 'id'),
+    ('daily', 'user_id', 'users', 'user_id'),
+    ('attachments', 'answer_id', 'answers', 'id'),
+]
+
+
+def replace_foreign_keys(ondelete: Optional[str]) -> None:
+    for table, column, referred_table, referred_column in foreign_keys:
+        # Default Postgres constraint name
+        name = f'{table}_{column}_fkey'
+
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], [referred_column], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_users_main_channel_id'), 'users', ['main_channel_id'], unique=False)
+    op.create_index('ix_questions_channel_id_id', 'questions', ['channel_id', 'id'], unique=False)
+    op.create_index(op.f('ix_answers_user_id'), 'answers', ['user_id'], unique=False)
+    op.create_index(op.f('ix_answers_question_id'), 'answers', ['question_id'], unique=False)
+    op.create_index(op.f('ix_daily_user_id'), 'daily', ['user_id'], unique=False)
+    op.create_index(op.f('ix_attachments_answer_id'), 'attachments', ['answer_id'], unique=False)
+
+    replace_foreign_keys(ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    replace_foreign_keys(ondelete=None)
+
+    op.drop_index(op.f('ix_attachments_answer_id'), table_name='attachments')
+    op.drop_index(op.f('ix_daily_user_id'), table_name='daily')
+    op.drop_index(op.f('ix_answers_question_id'), table_name='answers')
+    op.drop_index(op.f('ix_answers_user_id'), table_name='answers')
+    op.drop_index('ix_questions_channel_id_id', table_name='questions')
+    op.drop_index(op.f('ix_users_main_channel_id'), table_name='users')
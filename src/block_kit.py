@@ -1,6 +1,8 @@
 """Block kit templates"""
 
-from typing import Sequence, Optional
+from functools import lru_cache
+from string import Formatter
+from typing import Any, Callable, Optional, Sequence, Union
 
 from slack_sdk.models.blocks import Block
 from slack_sdk.models.blocks import SectionBlock
@@ -11,109 +13,390 @@ from slack_sdk.models.blocks import MarkdownTextObject
 from slack_sdk.models.blocks import DividerBlock
 from slack_sdk.models.blocks import HeaderBlock
 
+# Rendered blocks are plain dicts, so slack_sdk doesn't validate & serialize them on every call
+BlockDict = dict[str, Any]
 
-def report_attachment_block(
-        header_text: str,
-        body_text: str,
-        color: str,
-) -> BlockAttachment:
+# Max number of memoized constant blocks (errors, notifications)
+CONSTANT_BLOCKS_CACHE_SIZE = 256
+
+# Slack limits of a single message
+MAX_BLOCKS_PER_MESSAGE = 50
+MAX_SECTION_TEXT_LENGTH = 3000
+
+_formatter = Formatter()
+
+
+class BlockTemplate:
     """
-    Attachment unit to be sent as a report in the channel
-        :param header_text: Question text (no markdown)
-        :param body_text: Answer text (has markdown)
-        :param color: Color of the strip on the left side of the block
-        :return: Report block unit
+    Block Kit shape serialized to dicts once w/ "{field}" placeholders in text fields \n
+    Rendering copies only the parts w/ placeholders, constant parts are shared between renders
     """
 
-    return BlockAttachment(
-        blocks=[
-            HeaderBlock(
-                text=header_text,
-            ),
-            SectionBlock(
-                text=MarkdownTextObject(
-                    text=body_text,
+    def __init__(
+            self,
+            shape: Sequence[Union[Block, BlockAttachment]],
+    ) -> None:
+        """
+        :param shape: slack_sdk blocks or attachments w/ placeholders instead of variable texts
+        """
+
+        self.shape = [item.to_dict() for item in shape]
+        self._fill = self._compile(self.shape)
+
+    @classmethod
+    def _compile(
+            cls,
+            node: Any,
+    ) -> Optional[Callable[[dict[str, str]], Any]]:
+        """
+        Build filler function for the node
+            :param node: Serialized block or its part
+            :return: Function which renders the node or None if node has no placeholders
+        """
+
+        if isinstance(node, str):
+            fields = [field for _, field, _, _ in _formatter.parse(node) if field is not None]
+
+            if not fields:
+                return None
+
+            # Whole text is a single field
+            if node == "{" + fields[0] + "}":
+                field = fields[0]
+                return lambda values: values[field]
+
+            return node.format_map
+
+        if isinstance(node, dict):
+            fillers = {key: cls._compile(value) for key, value in node.items()}
+
+            if not any(fillers.values()):
+                return None
+
+            items = [(key, fillers[key], value) for key, value in node.items()]
+
+            return lambda values: {
+                key: value if filler is None else filler(values)
+                for key, filler, value in items
+            }
+
+        if isinstance(node, list):
+            fillers = [cls._compile(value) for value in node]
+
+            if not any(fillers):
+                return None
+
+            items = list(zip(fillers, node))
+
+            return lambda values: [
+                value if filler is None else filler(values)
+                for filler, value in items
+            ]
+
+        return None
+
+    def render(
+            self,
+            **values: str,
+    ) -> list[BlockDict]:
+        """
+        Fill placeholders w/ values
+            :param values: Text of every placeholder
+            :return: List of block (or attachment) dicts
+        """
+
+        if self._fill is None:
+            return self.shape
+
+        return self._fill(values)
+
+
+_report_attachment_template = BlockTemplate(
+    [
+        BlockAttachment(
+            blocks=[
+                HeaderBlock(
+                    text="{header_text}",
+                ),
+                SectionBlock(
+                    text=MarkdownTextObject(
+                        text="{body_text}",
+                    )
                 )
-            )
-        ],
-        color=color,
-    )
+            ],
+            # Attachment color is validated, so it's set on render
+            color="#000000",
+        ),
+    ]
+)
 
+_digest_header_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text="{header_text}",
+        ),
+        DividerBlock(),
+    ]
+)
 
-def start_daily_block(
-        header_text: str,
-        body_text: str,
-        first_question: str,
-) -> Sequence[Block]:
-    """
-    Set of blocks to be sent to users on daily start
-        :param header_text: Greetings above divider
-        :param body_text: Something inspirational (yup, daily is hard, cheer 'em up)
-        :param first_question: First question from question list
-        :return: Blocks to be sent on daily start
-    """
+_digest_section_template = BlockTemplate(
+    [
+        SectionBlock(
+            text=MarkdownTextObject(
+                text="{body_text}",
+            )
+        ),
+    ]
+)
 
-    return [
+_start_daily_template = BlockTemplate(
+    [
         ContextBlock(
             elements=[
                 MarkdownTextObject(
-                    text=header_text,
+                    text="{header_text}",
                 ),
             ]
         ),
         DividerBlock(),
         SectionBlock(
             text=MarkdownTextObject(
-                text=body_text,
+                text="{body_text}",
             )
         ),
         SectionBlock(
             text=MarkdownTextObject(
-                text=">" + first_question,
+                text=">{first_question}",
             )
         ),
     ]
+)
 
-
-def end_daily_block(
-        start_body_text: str,
-        end_body_text: str,
-        footer_text: str,
-) -> Sequence[Block]:
-    """
-    Set of blocks to be sent on daily end (all questions ended)
-        :param start_body_text: Show 'em your gratitude here and tag 'em
-        :param end_body_text: Something inspirational again (they have all day ahead)
-        :param footer_text: Where to find a report (add chanel link here)
-        :return: Blocks to be sent on daily end
-    """
-
-    return [
+_end_daily_template = BlockTemplate(
+    [
         SectionBlock(
             text=MarkdownTextObject(
-                text=start_body_text,
+                text="{start_body_text}",
             )
         ),
         SectionBlock(
             text=MarkdownTextObject(
-                text=end_body_text,
+                text="{end_body_text}",
             )
         ),
         DividerBlock(),
         ContextBlock(
             elements=[
                 MarkdownTextObject(
-                    text=footer_text,
+                    text="{footer_text}",
                 ),
             ]
         ),
     ]
+)
+
+_list_header_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text="{header_text}",
+        ),
+        DividerBlock(),
+    ]
+)
+
+_list_item_template = BlockTemplate(
+    [
+        SectionBlock(
+            text=MarkdownTextObject(
+                text="{index}\t{data}",
+            )
+        ),
+    ]
+)
+
+_error_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text=":x:\t{header_text}",
+        ),
+        DividerBlock(),
+    ]
+)
+
+_error_with_body_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text=":x:\t{header_text}",
+        ),
+        DividerBlock(),
+        SectionBlock(
+            fields=[
+                MarkdownTextObject(
+                    text="{body_text}",
+                )
+            ],
+        ),
+    ]
+)
+
+_success_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text=":white_check_mark:\t{header_text}",
+        ),
+        DividerBlock(),
+    ]
+)
+
+_success_with_body_template = BlockTemplate(
+    [
+        HeaderBlock(
+            text=":white_check_mark:\t{header_text}",
+        ),
+        SectionBlock(
+            text=MarkdownTextObject(
+                text="{body_text}",
+            )
+        ),
+        DividerBlock(),
+    ]
+)
+
+
+def report_attachment_block(
+        header_text: str,
+        body_text: str,
+        color: str,
+) -> BlockDict:
+    """
+    Attachment unit to be sent as a report in the channel
+        :param header_text: Question text (no markdown)
+        :param body_text: Answer text (has markdown)
+        :param color: Color of the strip on the left side of the block
+        :return: Report block unit
+    """
+
+    attachment = _report_attachment_template.render(
+        header_text=header_text,
+        body_text=body_text,
+    )[0]
+
+    attachment["color"] = color
+
+    return attachment
+
+
+def _split_text(
+        text: str,
+        max_length: int,
+) -> list[str]:
+    """
+    Split text by lines into chunks not longer than max_length (long lines are cut)
+        :param text: Text to be split
+        :param max_length: Max chunk length
+        :return: List of chunks
+    """
+
+    chunks = [""]
+
+    for line in text.split("\n"):
+        while len(line) > max_length:
+            chunks.append(line[:max_length])
+            line = line[max_length:]
+
+        if len(chunks[-1]) + len(line) + 1 > max_length:
+            chunks.append(line)
+        else:
+            chunks[-1] = f"{chunks[-1]}\n{line}" if chunks[-1] else line
+
+    return [chunk for chunk in chunks if chunk]
+
+
+def digest_blocks(
+        header_text: str,
+        reports: Sequence[tuple[str, Sequence[tuple[str, str]]]],
+) -> list[list[BlockDict]]:
+    """
+    Blocks of the channel digest (every report is a single section unless its text is too long) \n
+    Reports are packed into as few messages as Slack block limits allow
+        :param header_text: Header of the first message
+        :param reports: List of user id & question and answer pairs
+        :return: List of messages blocks
+    """
+
+    messages = [
+        _digest_header_template.render(
+            header_text=header_text,
+        )
+    ]
+
+    for user_id, answers in reports:
+        report_text = "\n".join(
+            [f"*<@{user_id}>*"] + [f"*{question}*\n{answer}" for question, answer in answers]
+        )
+
+        sections = [
+            _digest_section_template.render(body_text=chunk)[0]
+            for chunk in _split_text(report_text, MAX_SECTION_TEXT_LENGTH)
+        ]
+
+        # Keep the report in a single message if it fits into an empty one
+        if len(messages[-1]) + len(sections) > MAX_BLOCKS_PER_MESSAGE:
+            messages.append(list())
+
+        for section in sections:
+            if len(messages[-1]) == MAX_BLOCKS_PER_MESSAGE:
+                messages.append(list())
+
+            messages[-1].append(section)
+
+    return messages
+
+
+def start_daily_block(
+        header_text: str,
+        body_text: str,
+        first_question: str,
+) -> Sequence[BlockDict]:
+    """
+    Set of blocks to be sent to users on daily start
+        :param header_text: Greetings above divider
+        :param body_text: Something inspirational (yup, daily is hard, cheer 'em up)
+        :param first_question: First question from question list
+        :return: Blocks to be sent on daily start
+    """
+
+    return _start_daily_template.render(
+        header_text=header_text,
+        body_text=body_text,
+        first_question=first_question,
+    )
+
+
+def end_daily_block(
+        start_body_text: str,
+        end_body_text: str,
+        footer_text: str,
+) -> Sequence[BlockDict]:
+    """
+    Set of blocks to be sent on daily end (all questions ended)
+        :param start_body_text: Show 'em your gratitude here and tag 'em
+        :param end_body_text: Something inspirational again (they have all day ahead)
+        :param footer_text: Where to find a report (add chanel link here)
+        :return: Blocks to be sent on daily end
+    """
+
+    return _end_daily_template.render(
+        start_body_text=start_body_text,
+        end_body_text=end_body_text,
+        footer_text=footer_text,
+    )
 
 
 def list_block(
         header_text: str,
         list_to_be_parsed: list[any],
-) -> Sequence[Block]:
+) -> Sequence[BlockDict]:
     """
     Blocks constructor for get questions command
         :param header_text: Header of the list block
@@ -123,84 +406,63 @@ def list_block(
 
     from src.utils import int_to_slack_emoji
 
-    blocks = [
-        HeaderBlock(
-            text=header_text,
-        ),
-        DividerBlock(),
-    ]
+    blocks = _list_header_template.render(
+        header_text=header_text,
+    )
 
     # Add indexes (for pop command)
     for idx, data in enumerate(list_to_be_parsed, start=1):
-        blocks.append(
-            SectionBlock(
-                text=MarkdownTextObject(
-                    text=int_to_slack_emoji(idx) + "\t" + data,
-                )
+        blocks.extend(
+            _list_item_template.render(
+                index=int_to_slack_emoji(idx),
+                data=data,
             )
         )
 
     return blocks
 
 
+@lru_cache(maxsize=CONSTANT_BLOCKS_CACHE_SIZE)
 def error_block(
         header_text: str,
         body_text: Optional[str] = None,
-) -> Sequence[Block]:
+) -> Sequence[BlockDict]:
     """
-    Make it look beautiful at least when error occurs
+    Make it look beautiful at least when error occurs (memoized, texts are mostly constant)
         :param header_text: Error summary
         :param body_text: Error main message (Optional)
         :return: Error block
     """
 
-    blocks = [
-        HeaderBlock(
-            text=":x:\t" + header_text,
-        ),
-        DividerBlock(),
-    ]
-
-    if body_text is not None:
-        blocks.append(
-            SectionBlock(
-                fields=[
-                    MarkdownTextObject(
-                        text=body_text,
-                    )
-                ],
-            ),
+    if body_text is None:
+        return _error_template.render(
+            header_text=header_text,
         )
 
-    return blocks
+    return _error_with_body_template.render(
+        header_text=header_text,
+        body_text=body_text,
+    )
 
 
+@lru_cache(maxsize=CONSTANT_BLOCKS_CACHE_SIZE)
 def success_block(
         header_text: str,
         body_text: Optional[str] = None,
-) -> Sequence[Block]:
+) -> Sequence[BlockDict]:
     """
-    Block to be shown on success execution
+    Block to be shown on success execution (memoized, texts are mostly constant)
         :param header_text: Success summary
         :param body_text: Success main message (optional)
         :return: Success block
     """
 
-    blocks = [
-        HeaderBlock(
-            text=":white_check_mark:\t" + header_text,
-        ),
-        DividerBlock(),
-    ]
-
-    if body_text is not None:
-        blocks.insert(
-            1,
-            SectionBlock(
-                text=MarkdownTextObject(
-                    text=body_text,
-                )
-            ),
+    if body_text is None:
+        return _success_template.render(
+            header_text=header_text,
         )
 
-    return blocks
+    return _success_with_body_template.render(
+        header_text=header_text,
+        body_text=body_text,
+    )
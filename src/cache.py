@@ -0,0 +1,122 @@
+"""In-memory caches"""
+
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+# Sentinel for cache misses (None can be a cached value)
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Size bounded LRU cache w/ optional time to live for every entry
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: Optional[float] = None,
+    ) -> None:
+        """
+        :param maxsize: Max number of entries, least recently used entry is evicted first
+        :param ttl: Entry lifetime in seconds (None or 0 to keep entries until evicted)
+        """
+
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(
+            self,
+            key: Hashable,
+    ) -> Any:
+        """
+        Get cached value by key
+            :param key: Cache key
+            :return: Cached value or MISSING if key isn't cached or expired
+        """
+
+        entry = self._data.get(key, MISSING)
+
+        if entry is MISSING:
+            self.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+
+        if self.ttl and expires_at <= monotonic():
+            del self._data[key]
+
+            self.misses += 1
+            return MISSING
+
+        self._data.move_to_end(key)
+
+        self.hits += 1
+        return value
+
+    def set(
+            self,
+            key: Hashable,
+            value: Any,
+    ) -> None:
+        """
+        Cache value, evict least recently used entries if cache is full
+            :param key: Cache key
+            :param value: Value to be cached
+        """
+
+        self._data[key] = (monotonic() + self.ttl if self.ttl else 0.0, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(
+            self,
+            key: Hashable,
+    ) -> None:
+        """
+        Drop cached value by key if present
+            :param key: Cache key
+        """
+
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        Drop all cached values
+        """
+
+        self._data.clear()
+
+    def values(self) -> list[Any]:
+        """
+        Get all cached values (expired ones included) w/o touching LRU order & counters
+            :return: List of cached values
+        """
+
+        return [value for _, value in self._data.values()]
+
+    def stats(self) -> dict[str, int]:
+        """
+        Get cache usage counters
+            :return: Dict w/ hits, misses, evictions and current size
+        """
+
+        return dict(
+            hits_total=self.hits,
+            misses_total=self.misses,
+            evictions_total=self.evictions,
+            size=len(self._data),
+        )
@@ -0,0 +1,130 @@
+"""Channel digest: finished reports are buffered and posted together in as few messages as possible"""
+
+from os import getenv
+from typing import Optional
+
+from slack_sdk.web.async_client import AsyncWebClient
+
+from src.block_kit import digest_blocks, MAX_BLOCKS_PER_MESSAGE
+from src.db import Database
+from src.dispatcher import bulk_priority
+from src.metrics import reports_posted
+from src.sharding import owns_job
+from src.utils import skip_question_list
+
+# Number of buffered reports which triggers the digest before its window ends (a full message, header excluded)
+DIGEST_MAX_REPORTS = int(getenv("DIGEST_MAX_REPORTS", MAX_BLOCKS_PER_MESSAGE - 2))
+# Seconds after which reports claimed by a worker which died while posting them are taken over
+DIGEST_CLAIM_TIMEOUT = int(getenv("DIGEST_CLAIM_TIMEOUT", 300))
+
+
+def get_digest_job_id(
+        channel_id: str,
+) -> str:
+    return f"digest_{channel_id}"
+
+
+async def buffer_report(
+        channel_id: str,
+        user_id: str,
+        answers: list[dict[str, str]],
+) -> None:
+    """
+    Buffer finished report for the channel digest \n
+    Digest is posted by flush_digests when the window of the first buffered report ends
+    or right away as soon as a full message is collected
+        :param channel_id: Slack channel id
+        :param user_id: Slack user id
+        :param answers: Archived questions w/ answers (skipped answers are left out)
+    """
+
+    pending = await Database().add_digest_report(
+        channel_id=channel_id,
+        user_id=user_id,
+        answers=[
+            answer
+            for answer in answers
+            if answer["question"] is not None and str(answer["answer"]).lower() not in skip_question_list
+        ],
+    )
+
+    # Reports are claimed atomically, so any worker may post a full digest
+    if pending >= DIGEST_MAX_REPORTS:
+        await post_digest(
+            channel_id=channel_id,
+        )
+
+
+async def flush_digests() -> None:
+    """
+    Post digests whose window has ended (run periodically by every worker for the channels it owns)
+    """
+
+    for channel_id in await Database().get_due_digest_channels(claim_timeout=DIGEST_CLAIM_TIMEOUT):
+        if owns_job(job_id=get_digest_job_id(channel_id)):
+            await post_digest(
+                channel_id=channel_id,
+            )
+
+
+async def post_digest(
+        channel_id: str,
+        client: Optional[AsyncWebClient] = None,
+) -> None:
+    """
+    Post all buffered reports of the channel \n
+    Reports are claimed before and deleted only after all messages were posted,
+    so a failed post is retried by the next flush (a report may be posted twice, but it is never lost)
+        :param channel_id: Slack channel id
+        :param client: AsyncWebClient instance (Default: app client)
+    """
+
+    if client is None:
+        from main import app
+
+        client = app.client
+
+    db = Database()
+
+    digest_reports = await db.claim_digest_reports(
+        channel_id=channel_id,
+        claim_timeout=DIGEST_CLAIM_TIMEOUT,
+    )
+
+    if not digest_reports:
+        return
+
+    report_ids = [report_id for report_id, _, _ in digest_reports]
+
+    messages = digest_blocks(
+        header_text=f"Daily reports ({len(digest_reports)})",
+        reports=[
+            (user_id, [(answer["question"], answer["answer"]) for answer in answers])
+            for _, user_id, answers in digest_reports
+        ],
+    )
+
+    try:
+        # Messages are posted one by one to keep their order in the channel
+        with bulk_priority():
+            for blocks in messages:
+                await client.chat_postMessage(
+                    channel=channel_id,
+                    text=f":memo: {len(digest_reports)} daily reports were sent",
+                    blocks=blocks,
+                )
+    except Exception:
+        # Cancelled posts are left to the claim timeout
+        await db.release_digest_reports(
+            report_ids=report_ids,
+        )
+        raise
+
+    await db.delete_digest_reports(
+        report_ids=report_ids,
+    )
+
+    reports_posted.inc(
+        amount=len(digest_reports),
+        channel=channel_id,
+    )
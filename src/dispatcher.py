@@ -0,0 +1,469 @@
+"""Rate limit aware dispatcher for Slack Web API calls"""
+
+from __future__ import annotations
+
+from asyncio import Future, TimerHandle, get_running_loop
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from heapq import heappush, heappop
+from itertools import count
+from os import getenv
+from time import monotonic
+from typing import Awaitable, Callable, Hashable, Iterator, Mapping, Optional, Union
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web.async_client import AsyncWebClient
+from slack_sdk.web.async_slack_response import AsyncSlackResponse
+
+from src.cache import TTLCache, MISSING
+from src.metrics import slack_duration
+
+# Lower value is served first
+INTERACTIVE_PRIORITY = 0
+BULK_PRIORITY = 1
+
+# Requests per minute & burst size of Slack rate limit tiers
+# "special" tier is applied per channel (chat.postMessage allows ~1 message per second per channel)
+TIER_LIMITS: dict[Union[int, str], tuple[float, int]] = {
+    1: (1, 1),
+    2: (20, 5),
+    3: (50, 10),
+    4: (100, 20),
+    "special": (60, 1),
+}
+
+# Tiers of the methods used by the bot (unknown methods fall back to tier 3)
+METHOD_TIERS: dict[str, Union[int, str]] = {
+    "users.info": 4,
+    "conversations.members": 4,
+    "conversations.info": 3,
+    "conversations.open": 3,
+    "dnd.info": 3,
+    "dnd.teamInfo": 2,
+    "emoji.list": 2,
+    "chat.postMessage": "special",
+    "chat.postEphemeral": "special",
+}
+
+_priority: ContextVar[int] = ContextVar("slack_priority", default=INTERACTIVE_PRIORITY)
+
+
+@contextmanager
+def bulk_priority() -> Iterator[None]:
+    """
+    Serve Slack calls made inside the block (and tasks created there) after interactive ones
+    """
+
+    token = _priority.set(BULK_PRIORITY)
+
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class _PriorityWaiters:
+    """
+    Heap of futures waiting for a permit, served by priority then FIFO
+    """
+
+    _seq = count()
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[int, int, Future]] = list()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(
+            self,
+            priority: int,
+    ) -> Future:
+        """
+        Add new waiter
+            :param priority: Waiter priority
+            :return: Future to be resolved when permit is granted
+        """
+
+        waiter = get_running_loop().create_future()
+        heappush(self._heap, (priority, next(self._seq), waiter))
+
+        return waiter
+
+    def pop(self) -> Optional[Future]:
+        """
+        Get next waiter which is still waiting
+            :return: Future or None if there are no waiters
+        """
+
+        while self._heap:
+            _, _, waiter = heappop(self._heap)
+
+            if not waiter.done():
+                return waiter
+
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket w/ prioritized waiters and Retry-After pauses
+    """
+
+    def __init__(
+            self,
+            per_minute: float,
+            burst: int,
+    ) -> None:
+        """
+        :param per_minute: Refill rate in tokens per minute
+        :param burst: Bucket capacity
+        """
+
+        self.rate = per_minute / 60
+        self.capacity = burst
+        self.tokens = float(burst)
+
+        self._updated_at = monotonic()
+        self._paused_until = 0.0
+        self._waiters = _PriorityWaiters()
+        self._timer: Optional[TimerHandle] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def _refill(self) -> None:
+        now = monotonic()
+
+        if now >= self._paused_until:
+            # Resume w/ a single token right after Retry-After pause
+            if self._updated_at < self._paused_until:
+                self.tokens = max(self.tokens, 1.0)
+
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - max(self._updated_at, self._paused_until)) * self.rate,
+            )
+
+        self._updated_at = now
+
+    def _wake(self) -> None:
+        self._timer = None
+        self._refill()
+
+        while self.tokens >= 1:
+            waiter = self._waiters.pop()
+
+            if waiter is None:
+                return
+
+            self.tokens -= 1
+            waiter.set_result(None)
+
+        if len(self._waiters):
+            now = monotonic()
+
+            if now < self._paused_until:
+                delay = self._paused_until - now
+            else:
+                delay = (1 - self.tokens) / self.rate
+
+            self._timer = get_running_loop().call_later(delay, self._wake)
+
+    async def acquire(
+            self,
+            priority: int,
+    ) -> bool:
+        """
+        Wait for a token
+            :param priority: Caller priority
+            :return: True if the caller was throttled
+        """
+
+        self._refill()
+
+        # Fast path
+        if self.tokens >= 1 and not len(self._waiters):
+            self.tokens -= 1
+            return False
+
+        waiter = self._waiters.push(priority)
+
+        if self._timer is None:
+            self._wake()
+
+        await waiter
+
+        return True
+
+    def pause(
+            self,
+            seconds: float,
+    ) -> None:
+        """
+        Stop handing out tokens (on HTTP 429 w/ Retry-After)
+            :param seconds: Pause duration
+        """
+
+        self._refill()
+
+        self.tokens = 0.0
+        self._paused_until = max(self._paused_until, monotonic() + seconds)
+
+
+class PrioritySemaphore:
+    """
+    Semaphore which wakes waiters by priority
+    """
+
+    def __init__(
+            self,
+            value: int,
+    ) -> None:
+        """
+        :param value: Max number of concurrent holders
+        """
+
+        self.limit = value
+        self.in_flight = 0
+
+        self._waiters = _PriorityWaiters()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(
+            self,
+            priority: int,
+    ) -> None:
+        """
+        Wait for a free slot
+            :param priority: Caller priority
+        """
+
+        if self.in_flight < self.limit and not len(self._waiters):
+            self.in_flight += 1
+            return
+
+        waiter = self._waiters.push(priority)
+
+        try:
+            await waiter
+        except BaseException:
+            # Pass the slot to the next waiter if it was granted right before cancellation
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """
+        Free a slot or hand it over to the next waiter
+        """
+
+        waiter = self._waiters.pop()
+
+        if waiter is None:
+            self.in_flight -= 1
+            return
+
+        waiter.set_result(None)
+
+
+def get_retry_after(
+        headers: Mapping[str, str],
+) -> float:
+    """
+    Get Retry-After of HTTP 429 response (header names are case-insensitive, but headers may come as plain dict)
+        :param headers: Response headers
+        :return: Pause in seconds (Default: 1)
+    """
+
+    for name, value in headers.items():
+        if name.lower() == "retry-after":
+            return float(value)
+
+    return 1
+
+
+class SlackDispatcher:
+    """
+    Central gate for all Slack Web API calls
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int,
+            max_retries: int,
+    ) -> None:
+        """
+        :param max_concurrency: Max number of in-flight requests
+        :param max_retries: Max number of retries after HTTP 429
+        """
+
+        self.max_retries = max_retries
+
+        self._slots = PrioritySemaphore(max_concurrency)
+
+        # Per channel buckets are short-lived, so keep them in a bounded LRU
+        self._buckets = TTLCache(maxsize=10000)
+
+        self.calls = 0
+        self.throttled = 0
+        self.rate_limited = 0
+        self.wait_time_total = 0.0
+
+    def _get_bucket(
+            self,
+            api_method: str,
+            channel: Optional[str],
+    ) -> TokenBucket:
+        tier = METHOD_TIERS.get(api_method, 3)
+        key: Hashable = (api_method, channel) if tier == "special" else api_method
+
+        bucket = self._buckets.get(key)
+
+        if bucket is MISSING:
+            bucket = TokenBucket(*TIER_LIMITS[tier])
+            self._buckets.set(key, bucket)
+
+        return bucket
+
+    async def call(
+            self,
+            api_method: str,
+            send: Callable[[], Awaitable[AsyncSlackResponse]],
+            channel: Optional[str] = None,
+    ) -> AsyncSlackResponse:
+        """
+        Send the request once rate limit & concurrency allows it, retry on HTTP 429
+            :param api_method: Slack API method (e.g. chat.postMessage)
+            :param send: Coroutine function which performs the request
+            :param channel: Target channel (for per channel limited methods)
+            :return: Slack response
+        """
+
+        priority = _priority.get()
+        bucket = self._get_bucket(api_method, channel)
+
+        self.calls += 1
+
+        for attempt in range(self.max_retries + 1):
+            start = monotonic()
+
+            if await bucket.acquire(priority):
+                self.throttled += 1
+
+            await self._slots.acquire(priority)
+
+            self.wait_time_total += monotonic() - start
+
+            try:
+                return await send()
+            except SlackApiError as e:
+                if e.response.status_code != 429 or attempt == self.max_retries:
+                    raise
+
+                self.rate_limited += 1
+
+                bucket.pause(get_retry_after(e.response.headers))
+            finally:
+                self._slots.release()
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get queue depth & throttling counters
+            :return: Dict w/ calls, in-flight requests, queued requests, throttled & rate limited calls
+        """
+
+        buckets = self._buckets.values()
+
+        return dict(
+            calls_total=self.calls,
+            in_flight=self._slots.in_flight,
+            queued_slots=self._slots.queue_depth,
+            queued_tokens=sum(bucket.queue_depth for bucket in buckets),
+            throttled_total=self.throttled,
+            rate_limited_total=self.rate_limited,
+            wait_time_total=self.wait_time_total,
+        )
+
+
+dispatcher = SlackDispatcher(
+    max_concurrency=int(getenv("SLACK_MAX_CONCURRENCY", 20)),
+    max_retries=int(getenv("SLACK_MAX_RETRIES", 3)),
+)
+
+
+# Token -> DispatchingWebClient
+_token_clients = TTLCache(maxsize=int(getenv("SLACK_CLIENT_CACHE_SIZE", 100)))
+
+
+class DispatchingWebClient(AsyncWebClient):
+    """
+    AsyncWebClient which sends every API call through the dispatcher
+    """
+
+    @classmethod
+    def from_client(
+            cls,
+            client: AsyncWebClient,
+    ) -> DispatchingWebClient:
+        """
+        Copy settings of an existing client
+            :param client: AsyncWebClient instance
+            :return: DispatchingWebClient instance
+        """
+
+        return cls(
+            token=client.token,
+            base_url=client.base_url,
+            timeout=client.timeout,
+            ssl=client.ssl,
+            proxy=client.proxy,
+            session=client.session,
+            trust_env_in_session=client.trust_env_in_session,
+            headers=client.headers,
+            team_id=client.default_params.get("team_id"),
+            logger=client._logger,  # noqa
+            retry_handlers=client.retry_handlers,
+        )
+
+    @classmethod
+    def for_client(
+            cls,
+            client: AsyncWebClient,
+    ) -> DispatchingWebClient:
+        """
+        Get cached copy of a request client (Bolt creates one per request, they differ only by the token)
+            :param client: AsyncWebClient instance
+            :return: DispatchingWebClient instance
+        """
+
+        dispatching_client = _token_clients.get(client.token)
+
+        if dispatching_client is MISSING:
+            dispatching_client = cls.from_client(
+                client=client,
+            )
+            _token_clients.set(client.token, dispatching_client)
+
+        return dispatching_client
+
+    async def api_call(
+            self,
+            api_method: str,
+            **kwargs,
+    ) -> AsyncSlackResponse:
+        # Channel is passed either as json body, form data or query params
+        payload = kwargs.get("json") or kwargs.get("data") or kwargs.get("params") or dict()
+
+        with slack_duration.time(method=api_method):
+            return await dispatcher.call(
+                api_method=api_method,
+                send=partial(super().api_call, api_method, **kwargs),
+                channel=payload.get("channel") if isinstance(payload, dict) else None,
+            )
+
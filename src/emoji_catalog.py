@@ -0,0 +1,129 @@
+"""Workspace emoji catalog"""
+
+from __future__ import annotations
+
+from asyncio import Task, Lock, create_task, sleep
+from logging import getLogger
+from os import getenv
+from random import choice
+from typing import Optional
+
+from slack_sdk.web.async_client import AsyncWebClient
+
+# Used when workspace has no custom emoji
+DEFAULT_EMOJI = ":+1:"
+
+
+class EmojiCatalog:
+    """
+    Names of workspace emoji loaded once and refreshed in the background or on emoji_changed events
+    """
+
+    def __init__(
+            self,
+            refresh_interval: float,
+    ) -> None:
+        """
+        :param refresh_interval: Seconds between background refreshes
+        """
+
+        self.refresh_interval = refresh_interval
+        self.names: tuple[str, ...] = tuple()
+        self.loaded = False
+
+        self._lock = Lock()
+        self._task: Optional[Task] = None
+
+    async def refresh(
+            self,
+            client: AsyncWebClient,
+    ) -> None:
+        """
+        Reload all emoji names via emoji.list
+            :param client: AsyncWebClient instance
+        """
+
+        emoji_r = await client.emoji_list()
+
+        self.names = tuple(emoji_r.get("emoji", dict()))
+        self.loaded = True
+
+    async def random_emoji(
+            self,
+            client: AsyncWebClient,
+    ) -> str:
+        """
+        Choose random emoji name (catalog is loaded on the first call only)
+            :param client: AsyncWebClient instance
+            :return: Emoji name (DEFAULT_EMOJI if workspace has no custom emoji)
+        """
+
+        if not self.loaded:
+            async with self._lock:
+                # Skip if catalog was loaded while waiting for the lock
+                if not self.loaded:
+                    await self.refresh(
+                        client=client,
+                    )
+
+        return choice(self.names) if self.names else DEFAULT_EMOJI
+
+    def start(
+            self,
+            client: AsyncWebClient,
+    ) -> None:
+        """
+        Start background refresh loop if not already started
+            :param client: AsyncWebClient instance
+        """
+
+        if self._task is None or self._task.done():
+            self._task = create_task(
+                self._refresh_loop(
+                    client=client,
+                )
+            )
+
+    async def _refresh_loop(
+            self,
+            client: AsyncWebClient,
+    ) -> None:
+        while True:
+            try:
+                await self.refresh(
+                    client=client,
+                )
+            except Exception as e:
+                getLogger().warning(f"Emoji catalog wasn't refreshed: {e}")
+
+            await sleep(self.refresh_interval)
+
+    def apply_event(
+            self,
+            event: dict,
+    ) -> None:
+        """
+        Update catalog w/ emoji_changed event (no API calls)
+            :param event: emoji_changed event
+        """
+
+        # Catalog will be loaded on the first use
+        if not self.loaded:
+            return
+
+        names = set(self.names)
+
+        if event.get("subtype") == "add":
+            names.add(event["name"])
+        elif event.get("subtype") == "remove":
+            names.difference_update(event.get("names", []))
+        elif event.get("subtype") == "rename":
+            names.discard(event["old_name"])
+            names.add(event["new_name"])
+
+        self.names = tuple(names)
+
+
+emoji_catalog = EmojiCatalog(
+    refresh_interval=float(getenv("EMOJI_REFRESH_INTERVAL", 3600)),
+)
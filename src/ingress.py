@@ -0,0 +1,199 @@
+"""Socket Mode ingress decoupled from listeners processing"""
+
+from __future__ import annotations
+
+from asyncio import Semaphore, Task, create_task, gather
+from logging import Logger, getLogger
+from os import getenv
+from time import monotonic
+from typing import NamedTuple, Optional
+
+from slack_bolt.app.async_app import AsyncApp
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_bolt.adapter.socket_mode.async_internals import run_async_bolt_app
+from slack_sdk.socket_mode.async_client import AsyncBaseSocketModeClient
+from slack_sdk.socket_mode.request import SocketModeRequest
+from slack_sdk.socket_mode.response import SocketModeResponse
+
+from src.serializer import KeyedSerializer
+
+
+class Envelope(NamedTuple):
+    """
+    Socket Mode request waiting for its lane & a worker slot
+    """
+
+    request: SocketModeRequest
+    received_at: float
+
+
+def get_ordering_key(
+        request: SocketModeRequest,
+) -> str:
+    """
+    Get key of the user who caused the request (requests w/ the same key are processed in order)
+        :param request: Socket Mode request
+        :return: Slack user id or envelope id if request has no user
+    """
+
+    payload = request.payload or dict()
+
+    # Events API
+    event = payload.get("event")
+    if isinstance(event, dict) and isinstance(event.get("user"), str):
+        return event["user"]
+
+    # Slash commands
+    if isinstance(payload.get("user_id"), str):
+        return payload["user_id"]
+
+    # Interactivity
+    user = payload.get("user")
+    if isinstance(user, dict) and "id" in user:
+        return user["id"]
+
+    return request.envelope_id
+
+
+class QueuedSocketModeHandler(AsyncSocketModeHandler):
+    """
+    Socket Mode handler which acks envelopes right away and processes them in the background \n
+    Requests of a user run one by one in arrival order (per user lanes), requests of different users run
+    concurrently on a bounded number of worker slots, so a slow request only delays its own user
+    """
+
+    def __init__(
+            self,
+            *args,
+            workers: int,
+            queue_size: int,
+            **kwargs,
+    ) -> None:
+        """
+        :param workers: Max number of requests processed concurrently
+        :param queue_size: Max number of requests waiting for every worker slot (ingress waits when it's full)
+        """
+
+        super().__init__(*args, **kwargs)
+
+        self._serializer = KeyedSerializer()
+        self._slots = Semaphore(workers)
+        self._pending = Semaphore(workers * queue_size)
+        self._tasks: set[Task] = set()
+
+        self.received = 0
+        self.running = 0
+        self.processed = 0
+        self.failed = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    async def handle(  # type: ignore[override]
+            self,
+            client: AsyncBaseSocketModeClient,
+            req: SocketModeRequest,
+    ) -> None:
+        """
+        Ack envelope and start its processing in the lane of its user
+            :param client: Socket Mode client
+            :param req: Socket Mode request
+        """
+
+        self.received += 1
+
+        # Listeners only ack w/o payload, so Slack doesn't have to wait for processing
+        ack = create_task(
+            client.send_socket_mode_response(
+                SocketModeResponse(
+                    envelope_id=req.envelope_id,
+                )
+            )
+        )
+
+        # Semaphore waiters are woken in FIFO order, so arrival order is kept under backpressure
+        await self._pending.acquire()
+
+        # Tasks start in creation order & join their lane before the first suspension
+        task = create_task(
+            self._process(
+                Envelope(
+                    request=req,
+                    received_at=monotonic(),
+                )
+            )
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        await ack
+
+    async def _process(
+            self,
+            envelope: Envelope,
+    ) -> None:
+        try:
+            # Requests waiting for their lane don't take worker slots
+            async with self._serializer.lane(get_ordering_key(envelope.request)):
+                async with self._slots:
+                    latency = monotonic() - envelope.received_at
+                    self.latency_total += latency
+                    self.latency_max = max(self.latency_max, latency)
+
+                    self.running += 1
+
+                    try:
+                        await run_async_bolt_app(self.app, envelope.request)
+                    finally:
+                        self.running -= 1
+        except Exception as e:
+            self.failed += 1
+            getLogger().exception(f"Socket Mode request wasn't processed: {e}")
+        finally:
+            self.processed += 1
+            self._pending.release()
+
+    async def close_async(self) -> None:
+        await super().close_async()
+
+        # Let already acked requests finish
+        await gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, float]:
+        """
+        Get queue depth & latency counters
+            :return: Dict w/ received, processed & failed requests, running & waiting requests and queue latency
+        """
+
+        return dict(
+            received_total=self.received,
+            processed_total=self.processed,
+            failed_total=self.failed,
+            running=self.running,
+            queue_depth=len(self._tasks) - self.running,
+            active_lanes=len(self._serializer),
+            queue_latency_total=self.latency_total,
+            queue_latency_max=self.latency_max,
+        )
+
+
+def create_socket_mode_handler(
+        app: AsyncApp,
+        logger: Logger,
+        workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+) -> QueuedSocketModeHandler:
+    """
+    Create queued Socket Mode handler configured w/ INGRESS_WORKERS & INGRESS_QUEUE_SIZE
+        :param app: AsyncApp instance
+        :param logger: Logger instance
+        :param workers: Max concurrent requests (overrides INGRESS_WORKERS)
+        :param queue_size: Max waiting requests per worker slot (overrides INGRESS_QUEUE_SIZE)
+        :return: QueuedSocketModeHandler instance
+    """
+
+    return QueuedSocketModeHandler(
+        app=app,
+        logger=logger,
+        workers=workers or int(getenv("INGRESS_WORKERS", 16)),
+        queue_size=queue_size or int(getenv("INGRESS_QUEUE_SIZE", 100)),
+    )
@@ -1,21 +1,45 @@
 """Async event listeners"""
 
-from slack_bolt.context.async_context import AsyncAck, AsyncWebClient
+from slack_bolt.context.async_context import AsyncAck, AsyncWebClient, AsyncBoltContext
 
-from src.utils import is_dm_in_command, all_non_bot_members, create_multiple_user_with_real_name
+from src.utils import is_dm_in_command, sync_channel_members
 from src.utils import is_not_subscribed, skip_question_list
-from src.block_kit import success_block, error_block
+from src.block_kit import success_block, error_block, list_block
 from src.matchers import im_matcher, thread_matcher
+from src.profiles import get_user_profile, update_user_profile
+from src.dispatcher import DispatchingWebClient
+from src.serializer import dm_serializer
+from src.metrics import instrument_listener, answers_recorded
 from src.db import Database
 
 from main import app
 from asyncio import gather
+from json import dumps, loads
 from logging import Logger
+from typing import Awaitable, Callable
+
+
+@app.middleware
+async def dispatcher_middleware(
+        context: AsyncBoltContext,
+        next: Callable[[], Awaitable[None]],  # noqa
+) -> None:
+    """
+    Replace request's client w/ the one which sends calls through rate limit aware dispatcher
+    """
+
+    if not isinstance(context.client, DispatchingWebClient):
+        context["client"] = DispatchingWebClient.for_client(
+            client=context.client,
+        )
+
+    await next()
 
 
 @app.command(
     "/channel_append",
 )
+@instrument_listener
 async def channel_append_listener(
         ack: AsyncAck,
         body: dict,
@@ -63,17 +87,11 @@ async def channel_append_listener(
             user=body["user_id"],
         )
 
-        member_list = await all_non_bot_members(
-            client=client,
-            channel_id=body["channel_id"],
-        )
-
-        # Parse user to db
-        await create_multiple_user_with_real_name(
+        # Parse users to db
+        await sync_channel_members(
             client=client,
             db_connection=db,
             channel_id=body["channel_id"],
-            member_list=member_list,
         )
 
         # Post a message on success
@@ -103,6 +121,7 @@ async def channel_append_listener(
 @app.command(
     "/channel_pop",
 )
+@instrument_listener
 async def channel_pop_listener(
         ack: AsyncAck,
         body: dict,
@@ -153,6 +172,14 @@ async def channel_pop_listener(
             channel_id=body["channel_id"],
         )
 
+        from src.utils import unschedule_channel
+
+        # Remove channel's daily job
+        unschedule_channel(
+            channel_id=body["channel_id"],
+            team_id=body["team_id"],
+        )
+
         await client.chat_postEphemeral(
             channel=body["channel_id"],
             text=":white_check_mark: Channel has been successfully unsubscribed",
@@ -178,6 +205,7 @@ async def channel_pop_listener(
 @app.event(
     "member_joined_channel",
 )
+@instrument_listener
 async def join_channel_listener(
         ack: AsyncAck,
         body: dict,
@@ -206,9 +234,11 @@ async def join_channel_listener(
 
     # Parse user's real_name and creator_id
     real_name = (
-        await client.users_info(
-            user=body["event"]["user"])
-    )["user"]["real_name"]
+        await get_user_profile(
+            client=client,
+            user_id=body["event"]["user"],
+        )
+    ).real_name
 
     # Add user to the user_list
     await db.create_user(
@@ -239,6 +269,7 @@ async def join_channel_listener(
 @app.event(
     "member_left_channel",
 )
+@instrument_listener
 async def leave_channel_listener(
         ack: AsyncAck,
         body: dict,
@@ -270,9 +301,11 @@ async def leave_channel_listener(
 
     # Parse user's real_name and creator_id
     real_name = (
-        await client.users_info(
-            user=body["event"]["user"])
-    )["user"]["real_name"]
+        await get_user_profile(
+            client=client,
+            user_id=body["event"]["user"],
+        )
+    ).real_name
 
     creator_id = (
         await client.conversations_info(
@@ -290,9 +323,50 @@ async def leave_channel_listener(
     )
 
 
+@app.event(
+    "user_change",
+)
+@instrument_listener
+async def user_change_listener(
+        ack: AsyncAck,
+        body: dict,
+) -> None:
+    """
+    Listen for user profile changes to keep cached profiles fresh \n
+    """
+
+    await ack()
+
+    update_user_profile(
+        user=body["event"]["user"],
+    )
+
+
+@app.event(
+    "emoji_changed",
+)
+@instrument_listener
+async def emoji_changed_listener(
+        ack: AsyncAck,
+        body: dict,
+) -> None:
+    """
+    Listen for added, removed or renamed emoji to keep emoji catalog fresh \n
+    """
+
+    await ack()
+
+    from src.emoji_catalog import emoji_catalog
+
+    emoji_catalog.apply_event(
+        event=body["event"],
+    )
+
+
 @app.command(
     "/refresh_users",
 )
+@instrument_listener
 async def refresh_users_listener(
         ack: AsyncAck,
         body: dict,
@@ -334,17 +408,11 @@ async def refresh_users_listener(
         channel_id=body["channel_id"],
     )
 
-    member_list = await all_non_bot_members(
-        client=client,
-        channel_id=body["channel_id"],
-    )
-
-    # Parse user to db
-    await create_multiple_user_with_real_name(
+    # Parse users to db
+    await sync_channel_members(
         client=client,
         db_connection=db,
         channel_id=body["channel_id"],
-        member_list=member_list,
     )
 
     # Notification to the user
@@ -361,6 +429,7 @@ async def refresh_users_listener(
 @app.command(
     "/questions",
 )
+@instrument_listener
 async def questions_listener(
         ack: AsyncAck,
         body: dict,
@@ -410,8 +479,6 @@ async def questions_listener(
         )
         return
 
-    from src.block_kit import list_block
-
     # Send user list to user
     await client.chat_postEphemeral(
         text="Question list has arrived",
@@ -427,6 +494,7 @@ async def questions_listener(
 @app.command(
     "/question_append",
 )
+@instrument_listener
 async def question_append_listener(
         ack: AsyncAck,
         body: dict,
@@ -495,6 +563,7 @@ async def question_append_listener(
 @app.command(
     "/question_pop",
 )
+@instrument_listener
 async def question_pop_listener(
         ack: AsyncAck,
         body: dict,
@@ -582,6 +651,7 @@ async def question_pop_listener(
 @app.command(
     "/cron",
 )
+@instrument_listener
 async def cron_listener(
         ack: AsyncAck,
         body: dict,
@@ -630,10 +700,11 @@ async def cron_listener(
             raise ValueError
 
         user_tz = (
-            await app.client.users_info(
-                user=body["user_id"],
+            await get_user_profile(
+                client=client,
+                user_id=body["user_id"],
             )
-        )["user"]["tz"]
+        ).tz
 
         user_tz_info = ZoneInfo(key=user_tz)
 
@@ -662,10 +733,12 @@ async def cron_listener(
         cron_tz=user_tz,
     )
 
-    from src.utils import start_cron
+    from src.utils import reschedule_channel
 
-    # Update CronTrigger in scheduler
-    await start_cron()
+    # Update CronTrigger of this channel only
+    await reschedule_channel(
+        channel_id=body["channel_id"],
+    )
 
     # Get next trigger time from CronTrigger
     cron_trigger_next_fire_time_in_user_tz = cron_trigger.get_next_fire_time(
@@ -686,12 +759,104 @@ async def cron_listener(
     )
 
 
+@app.command(
+    "/digest",
+)
+@instrument_listener
+async def digest_listener(
+        ack: AsyncAck,
+        body: dict,
+        client: AsyncWebClient,
+        logger: Logger,
+) -> None:
+    """
+    Listen for command digest in subscribed channels \n
+    Exits if command was send in DM
+    """
+
+    await ack()
+    logger.warning(
+        f"/digest: Command was acknowledged\n"
+        f"Channel: {body['channel_name']}\tUser: {body['user_id']}"
+    )
+
+    # Catch if command was used in DM
+    if await is_dm_in_command(
+            client=client,
+            channel_name=body["channel_name"],
+            user_id=body["user_id"],
+    ):
+        return
+
+    db = Database()
+
+    # Check if not subscribed
+    if await is_not_subscribed(
+            client=client,
+            db_connection=db,
+            channel_id=body["channel_id"],
+            user_id=body["user_id"],
+    ):
+        return
+
+    # Validate user input (window in minutes or "off")
+    digest_window = None
+
+    if body["text"].strip().lower() != "off":
+        try:
+            digest_window = int(body["text"])
+
+            if not 0 < digest_window <= 24 * 60:
+                raise ValueError
+        except ValueError:
+            await client.chat_postEphemeral(
+                channel=body["channel_id"],
+                text=":x: Incorrect digest window",
+                blocks=error_block(
+                    header_text="Incorrect digest window",
+                    body_text="Specify minutes from 1 to 1440 (e.g. `/digest 30`) or turn digest off w/ `/digest off`",
+                ),
+                user=body["user_id"],
+            )
+            return
+
+    await db.update_digest_window_by_channel_id(
+        channel_id=body["channel_id"],
+        digest_window=digest_window,
+    )
+
+    if digest_window is None:
+        from src.digest import post_digest
+
+        # Post reports buffered before digest was turned off
+        await post_digest(
+            channel_id=body["channel_id"],
+            client=client,
+        )
+
+    # Post notification on success
+    await client.chat_postEphemeral(
+        channel=body["channel_id"],
+        text=":white_check_mark: Digest has been updated",
+        blocks=success_block(
+            header_text="Digest has been updated",
+            body_text=(
+                f":hourglass_flowing_sand: Reports are posted together *{digest_window} min* after the first one"
+                if digest_window else
+                ":zap: Every report is posted as soon as it's finished"
+            ),
+        ),
+        user=body["user_id"],
+    )
+
+
 @app.event(
     "message",
     matchers=[
         im_matcher,
     ],
 )
+@instrument_listener
 async def im_listener(
         ack: AsyncAck,
         client: AsyncWebClient,
@@ -703,200 +868,233 @@ async def im_listener(
 
     await ack()
 
-    db = Database()
+    # Process answers of the same user one by one (state is read before the answer is recorded)
+    async with dm_serializer.lane(message["user"]):
+        db = Database()
 
-    # Get user daily status
-    user_status = await db.get_user_status(
-        user_id=message["user"],
-    )
+        # Answer is recorded against the state it was read for, state is re-read if another replica moved the cursor
+        while True:
+            # Get user's daily status & main channel at once
+            user_state = await db.get_user_dialog_state(
+                user_id=message["user"],
+            )
 
-    # Notify if user not subscribed
-    if user_status is None:
-        # Send notification about unsubscribed status
-        await client.chat_postMessage(
-            channel=message["channel"],
-            text=":x: You are not subscribed",
-            blocks=error_block(
-                header_text="You are not subscribed to daily bot",
-                body_text="Invite the bot to the channel with you as a member to subscribe",
-            ),
-        )
+            # Notify if user not subscribed
+            if user_state is None:
+                # Send notification about unsubscribed status
+                await client.chat_postMessage(
+                    channel=message["channel"],
+                    text=":x: You are not subscribed",
+                    blocks=error_block(
+                        header_text="You are not subscribed to daily bot",
+                        body_text="Invite the bot to the channel with you as a member to subscribe",
+                    ),
+                )
 
-        return
+                return
+
+            # Skip if daily wasn't started for the user
+            if not user_state["daily_status"]:
+                # Send notification about user's daily status
+                await client.chat_postMessage(
+                    channel=message["channel"],
+                    text=":x: Bot is inactive at the moment",
+                    blocks=error_block(
+                        header_text="Bot is inactive at the moment",
+                        body_text="Daily meeting hasn't been started yet or you answered on all questions",
+                    ),
+                )
+                return
 
-    # Skip if daily wasn't started for the user
-    if not user_status:
-        # Send notification about user's daily status
-        await client.chat_postMessage(
-            channel=message["channel"],
-            text=":x: Bot is inactive at the moment",
-            blocks=error_block(
-                header_text="Bot is inactive at the moment",
-                body_text="Daily meeting hasn't been started yet or you answered on all questions",
-            ),
-        )
-        return
+            # Import color scheme
+            from src.utils import default_colors
 
-    # Import color scheme
-    from src.utils import default_colors
+            # Import block kit & post_report
+            from src.block_kit import report_attachment_block, end_daily_block
+            from src.report import post_report, add_report_attachment, is_report_draft_complete, pop_report_draft
 
-    # Import block kit & post_report
-    from src.block_kit import report_attachment_block, end_daily_block
-    from src.report import post_report
+            # Get user questions index
+            user_idx = user_state["q_idx"]
 
-    # Get questions list
-    user_main_channel = await db.get_user_main_channel(
-        user_id=message["user"],
-    )
+            # Get questions list (cached, reloaded if the user's question isn't there)
+            user_main_channel = user_state["main_channel_id"]
 
-    questions_info = await db.get_all_questions(
-        channel_id=user_main_channel,
-    )
+            question_set = await db.get_question_set(
+                channel_id=user_main_channel,
+                question_id=user_idx or None,
+            )
 
-    question_idx_list = [idx for question, idx in questions_info]
+            question_idx_list = question_set.ids
 
-    # Get question_list length
-    questions_length: int = len(questions_info)
+            # Get question_list length
+            questions_length: int = len(question_idx_list)
 
-    # Get user questions index
-    user_idx = await db.get_user_q_idx(
-        user_id=message['user'],
-    )
+            # Question was deleted during the daily, continue w/ the following one (answer can't be recorded)
+            if user_idx and user_idx not in question_set.next_id:
+                following_idx_list = [idx for idx in question_idx_list if idx > user_idx]
+                next_q_idx = following_idx_list[0] if following_idx_list else question_idx_list[-1]
 
-    if not user_idx:
-        current_question_idx = 1
-    else:
-        current_question_idx = question_idx_list.index(user_idx)
-
-    next_q_idx = question_idx_list[
-        current_question_idx + 1
-        if current_question_idx + 1 < questions_length
-        else 0
-    ]
-
-    # Updated questions index
-    await db.update_user_q_idx(
-        user_id=message["user"],
-        q_idx=next_q_idx,
-    )
+                await db.update_user_q_idx(
+                    user_id=message["user"],
+                    q_idx=next_q_idx,
+                )
 
-    # Write user's answer
-    await db.set_user_answer(
-        user_id=message["user"],
-        question_id=user_idx,  # Get question id
-        answer=message["text"],
-    )
+                await client.chat_postMessage(
+                    channel=message["channel"],
+                    text=">" + question_set.body[next_q_idx],
+                    mrkdwn=True,  # Enable markdown
+                )
 
-    # Update user's daily status if idx is out of range
-    if user_idx == question_idx_list[-1]:
-        # Delete user's daily status & idx
-        await db.reset_user_daily_status(
-            user_id=message["user"],
-        )
+                return
 
-        # Skip if there is no channel
-        if not user_main_channel:
-            await client.chat_postMessage(
-                channel=message["channel"],
-                text=":x: Daily will not be posted",
-                blocks=error_block(
-                    header_text="Daily will not be posted",
-                    body_text="You aren't subscribed to a channel.\nRun this in your daily channel `/refresh_users`",
-                ),
+            if not user_idx:
+                next_q_idx = question_idx_list[2 if 2 < questions_length else 0]
+            else:
+                next_q_idx = question_set.next_id[user_idx]
+
+            # Check if it is the last question
+            is_last_question = user_idx == question_idx_list[-1]
+
+            # Render the answer once, report is built up answer by answer
+            position = question_set.position.get(user_idx)
+            attachment = None
+
+            if position is not None and str(message["text"]).lower() not in skip_question_list:
+                attachment = report_attachment_block(
+                    header_text=str(question_set.body[user_idx]),
+                    body_text=str(message["text"]),
+                    color=default_colors[position % len(default_colors)],
+                )
+
+            # Report is taken from memory if the draft holds all previous answers
+            draft_complete = is_last_question and is_report_draft_complete(
+                user_id=message["user"],
+                position=position,
             )
 
-            return
+            # Write user's answer & update questions index (or reset daily status if idx is out of range)
+            # Stored attachments are collected only if the report isn't complete in memory
+            recorded = await db.record_user_answer(
+                user_id=message["user"],
+                question_id=user_idx,  # Get question id
+                answer=message["text"],
+                next_q_idx=next_q_idx,
+                finished=is_last_question,
+                attachment=None if attachment is None else dumps(attachment),
+                collect_report=not draft_complete,
+            )
 
-        # Get user answers
-        user_answers = await db.get_user_answers(
-            user_id=message["user"],
-        )
+            if recorded is not None:
+                break
 
-        # Delete user's answers from database
-        await db.delete_user_answers(
+        # Draft is updated only after the answer is persisted, so a failed write is retried w/o duplicates
+        add_report_attachment(
             user_id=message["user"],
+            position=position,
+            attachment=attachment,
         )
 
-        # Collect answers_block
-        attachments = list()
+        answers_recorded.inc(channel=user_main_channel)
+
+        if is_last_question:
+            attachments = pop_report_draft(
+                user_id=message["user"],
+                questions_length=questions_length,
+            )
 
-        # Update color scheme length if needed
-        if questions_length > len(default_colors):
-            from math import ceil
+            # Skip if there is no channel
+            if not user_main_channel:
+                await client.chat_postMessage(
+                    channel=message["channel"],
+                    text=":x: Daily will not be posted",
+                    blocks=error_block(
+                        header_text="Daily will not be posted",
+                        body_text="You aren't subscribed to a channel.\nRun this in your daily channel `/refresh_users`",
+                    ),
+                )
 
-            default_colors *= ceil(questions_length / len(default_colors))
+                return
 
-        for idx, user_set in enumerate(user_answers):
-            # Check for skips in user answers
-            if str(user_set["answer"]).lower() in skip_question_list:
-                continue
+            if attachments is None:
+                attachments = [loads(user_attachment) for user_attachment in recorded.attachments]
 
-            # Create attachments
-            attachments.append(
-                report_attachment_block(
-                    header_text=str(user_set["question"]),
-                    body_text=str(user_set["answer"]),
-                    color=default_colors[idx],
-                )
+            # Get user info
+            user_profile = await get_user_profile(
+                client=client,
+                user_id=message["user"],
             )
 
-        # Get user info
-        user_info = (await client.users_info(user=message["user"]))["user"]
+            # Create channel link
+            channel_link = (
+                f"<slack://channel?team={user_state['team_id']}&id={user_main_channel}|#{user_state['channel_name']}>"
+            )
 
-        # Create channel link
-        channel_name, channel_team_id = await db.get_channel_link_info(
-            channel_id=user_main_channel,
-        )
+            # Send report
+            async_tasks = list()
 
-        channel_link = f"<slack://channel?team={channel_team_id}&id={user_main_channel}|#{channel_name}>"
+            if user_state["digest_window"]:
+                from src.digest import buffer_report
 
-        # Send report
-        async_tasks = list()
+                # Report is posted w/ the channel digest
+                async_tasks.append(
+                    buffer_report(
+                        channel_id=user_main_channel,
+                        user_id=message["user"],
+                        answers=recorded.answers,
+                    )
+                )
 
-        async_tasks.append(
-            post_report(
-                app=client,
-                db_connection=db,
-                channel=user_main_channel,
-                user_id=message["user"],
-                attachments=attachments,
-                username=user_info["real_name"],
-                icon_url=user_info["profile"]["image_48"],
-            )
-        )
+                notification_text = ":white_check_mark: Daily was saved for the digest"
+                footer_text = f"Your report will be posted in {channel_link} w/ the daily digest"
+            else:
+                async_tasks.append(
+                    post_report(
+                        app=client,
+                        db_connection=db,
+                        channel=user_main_channel,
+                        user_id=message["user"],
+                        attachments=attachments,
+                        username=user_profile.real_name,
+                        icon_url=user_profile.image_48,
+                    )
+                )
 
-        # Send notification to the user
-        async_tasks.append(
-            client.chat_postMessage(
-                channel=message["channel"],
-                text=":white_check_mark: Daily was posted",
-                blocks=end_daily_block(
-                    start_body_text=f"Thanks, <@{message['user']}>!",
-                    end_body_text="Have a wonderful and productive day :four_leaf_clover: ",
-                    footer_text=f"You can see your latest report in {channel_link}",
-                ),
+                notification_text = ":white_check_mark: Daily was posted"
+                footer_text = f"You can see your latest report in {channel_link}"
+
+            # Send notification to the user
+            async_tasks.append(
+                client.chat_postMessage(
+                    channel=message["channel"],
+                    text=notification_text,
+                    blocks=end_daily_block(
+                        start_body_text=f"Thanks, <@{message['user']}>!",
+                        end_body_text="Have a wonderful and productive day :four_leaf_clover: ",
+                        footer_text=footer_text,
+                    ),
+                )
             )
-        )
 
-        # Execute all tasks at once
-        await gather(*async_tasks)
+            # Execute all tasks at once
+            await gather(*async_tasks)
 
-        # Exit
-        return
+            # Exit
+            return
 
-    next_question = list(filter(lambda question_info: question_info[1] == next_q_idx, questions_info))[0][0]
+        next_question = question_set.body[next_q_idx]
 
-    # Send question to dm
-    await client.chat_postMessage(
-        channel=message["channel"],
-        text=">" + next_question,
-        mrkdwn=True,  # Enable markdown
-    )
+        # Send question to dm
+        await client.chat_postMessage(
+            channel=message["channel"],
+            text=">" + next_question,
+            mrkdwn=True,  # Enable markdown
+        )
 
 
 @app.command(
     "/skip_daily",
 )
+@instrument_listener
 async def skip_daily_listener(
         ack: AsyncAck,
         body: dict,
@@ -941,6 +1139,10 @@ async def skip_daily_listener(
         channel_id=body["channel_id"],
     )
 
+    # Skip if schedule wasn't set (channel was already notified)
+    if cron_trigger_next_fire_time is None:
+        return
+
     # Notify channel about skipped daily
     await client.chat_postMessage(
         channel=body["channel_id"],
@@ -989,9 +1191,42 @@ async def skip_daily_listener(
 #         )
 
 
+# Help payloads are the same for every call, so they're rendered once on import
+user_help_blocks = list_block(
+    header_text="How to use the bot",
+    list_to_be_parsed=[
+        "*You will receive a message when daily starts*",
+        "*Questions will be sent one by one*",
+        "*Take your time, you do not have time restrictions to answer a question*",
+    ],
+)
+
+skip_help_blocks = list_block(
+    header_text="To skip a question send one from the list",
+    list_to_be_parsed=[f"`{skip_answer}`" for skip_answer in skip_question_list],
+)
+
+# All commands w/ brief comments
+admin_help_blocks = list_block(
+    header_text="Administrative commands",
+    list_to_be_parsed=[
+        "`/channel_append`\n> *Subscribe channel for daily meetings*",
+        "`/channel_pop`\n> *Unsubscribe channel from daily meetings*",
+        "`/questions`\n> *Get list of all questions for the channel*",
+        "`/question_append`\n> *Add channel to channel's question list*",
+        "`/question_pop`\n> *Removes channel from channel's question list*",
+        "`/cron`\n> *Set or change channel's <https://crontab.guru|cron> schedule*",
+        "`/digest`\n> *Post reports together as a single digest after specified minutes (`off` to disable)*",
+        "`/skip_daily`\n> *Postpones closest daily meeting to the next fire time of the <https://crontab.guru|cron>*",
+        "`/refresh_users`\n> *Force refresh all members of the channel*\n> (in case of unexpected behaviour)"
+    ],
+)
+
+
 @app.command(
     "/help",
 )
+@instrument_listener
 async def help_listener(
         ack: AsyncAck,
         body: dict,
@@ -1003,28 +1238,17 @@ async def help_listener(
 
     await ack()
 
-    from src.block_kit import list_block
-
     # Different answer in DMs
     if body["channel_name"] == "directmessage":  # noqa
         conversation_info = await client.conversations_open(
             users=body["user_id"],
         )
 
-        user_help = [
-            "*You will receive a message when daily starts*",
-            "*Questions will be sent one by one*",
-            "*Take your time, you do not have time restrictions to answer a question*",
-        ]
-
         # Send general info
         await client.chat_postMessage(
             channel=conversation_info["channel"]["id"],
             text="Help message has arrived",
-            blocks=list_block(
-                header_text="How to use the bot",
-                list_to_be_parsed=user_help,
-            ),
+            blocks=user_help_blocks,
         )
 
         # If there is empty skip_question_list users cant skip messages
@@ -1033,10 +1257,7 @@ async def help_listener(
             await client.chat_postMessage(
                 channel=conversation_info["channel"]["id"],
                 text="Help message has arrived",
-                blocks=list_block(
-                    header_text="To skip a question send one from the list",
-                    list_to_be_parsed=[f"`{skip_answer}`" for skip_answer in skip_question_list],
-                ),
+                blocks=skip_help_blocks,
             )
 
         return
@@ -1052,25 +1273,10 @@ async def help_listener(
     ):
         return
 
-    # All commands w/ brief comments
-    all_commands = [
-        "`/channel_append`\n> *Subscribe channel for daily meetings*",
-        "`/channel_pop`\n> *Unsubscribe channel from daily meetings*",
-        "`/questions`\n> *Get list of all questions for the channel*",
-        "`/question_append`\n> *Add channel to channel's question list*",
-        "`/question_pop`\n> *Removes channel from channel's question list*",
-        "`/cron`\n> *Set or change channel's <https://crontab.guru|cron> schedule*",
-        "`/skip_daily`\n> *Postpones closest daily meeting to the next fire time of the <https://crontab.guru|cron>*",
-        "`/refresh_users`\n> *Force refresh all members of the channel*\n> (in case of unexpected behaviour)"
-    ]
-
     # Send ephemeral to user w/ all commands
     await client.chat_postEphemeral(
         channel=body["channel_id"],
         user=body["user_id"],
         text="Help message has arrived",
-        blocks=list_block(
-            header_text="Administrative commands",
-            list_to_be_parsed=all_commands,
-        )
+        blocks=admin_help_blocks,
     )
@@ -0,0 +1,431 @@
+"""Hot path timings & counters exported in OpenMetrics text format"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from os import getenv
+from time import perf_counter
+from typing import Any, Callable, Optional, TypeVar
+
+from aiohttp import web
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# Seconds, from fast DB lookups to Slack calls waiting for rate limits
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+F = TypeVar("F", bound=Callable[..., Any])
+M = TypeVar("M", bound="_Metric")
+
+
+def _escape(
+        value: str,
+) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_labels(
+        labels: dict[str, str],
+) -> str:
+    if not labels:
+        return ""
+
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+class _Metric(ABC):
+    """
+    Metric family w/ values by label set
+    """
+
+    type_name = ""
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+    ) -> None:
+        """
+        :param name: Metric family name
+        :param documentation: HELP line
+        :param labelnames: Names of the labels (values are passed on every update)
+        """
+
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+
+        self._values: dict[tuple[str, ...], Any] = dict()
+
+    def _key(
+            self,
+            labels: dict[str, str],
+    ) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# TYPE {self.name} {self.type_name}",
+            f"# HELP {self.name} {_escape(self.documentation)}",
+        ]
+
+        for key, value in self._values.items():
+            lines.extend(self._render_value(dict(zip(self.labelnames, key)), value))
+
+        return lines
+
+    @abstractmethod
+    def _render_value(
+            self,
+            labels: dict[str, str],
+            value: Any,
+    ) -> list[str]:
+        """
+        Render samples of a single label set
+            :param labels: Label values
+            :param value: Stored value
+            :return: Sample lines
+        """
+
+
+class Counter(_Metric):
+    """
+    Monotonic counter
+    """
+
+    type_name = "counter"
+
+    def inc(
+            self,
+            amount: float = 1,
+            **labels: str,
+    ) -> None:
+        """
+        Increase counter
+            :param amount: Increment
+            :param labels: Label values
+        """
+
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_value(
+            self,
+            labels: dict[str, str],
+            value: float,
+    ) -> list[str]:
+        return [f"{self.name}_total{_format_labels(labels)} {value}"]
+
+
+class Histogram(_Metric):
+    """
+    Histogram w/ fixed buckets
+    """
+
+    type_name = "histogram"
+
+    def __init__(
+            self,
+            name: str,
+            documentation: str,
+            labelnames: tuple[str, ...] = (),
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """
+        :param name: Metric family name
+        :param documentation: HELP line
+        :param labelnames: Names of the labels (values are passed on every update)
+        :param buckets: Upper bounds of the buckets (+Inf is added implicitly)
+        """
+
+        super().__init__(name, documentation, labelnames)
+
+        self.buckets = buckets
+
+    def observe(
+            self,
+            value: float,
+            **labels: str,
+    ) -> None:
+        """
+        Record observation
+            :param value: Observed value
+            :param labels: Label values
+        """
+
+        key = self._key(labels)
+
+        # Counts of every bucket (not cumulative) + +Inf bucket, sum
+        state = self._values.get(key)
+
+        if state is None:
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        state[0][bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def time(
+            self,
+            **labels: str,
+    ) -> _Timer:
+        """
+        Observe duration of the block
+            :param labels: Label values
+            :return: Context manager
+        """
+
+        return _Timer(self, labels)
+
+    def _render_value(
+            self,
+            labels: dict[str, str],
+            value: list,
+    ) -> list[str]:
+        counts, total = value
+
+        lines = list()
+        cumulative = 0
+
+        for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+            cumulative += bucket_count
+            lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': str(bound)})} {cumulative}")
+
+        lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(labels)} {total}")
+
+        return lines
+
+
+class _Timer:
+    """
+    Context manager which observes time spent inside (awaits included)
+    """
+
+    def __init__(
+            self,
+            histogram: Histogram,
+            labels: dict[str, str],
+    ) -> None:
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self) -> None:
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    """
+    Collection of metric families & gauge callbacks rendered on scrape
+    """
+
+    def __init__(self) -> None:
+        self._metrics: list[_Metric] = list()
+        self._gauges: list[tuple[str, str, Callable[[], dict[str, float]]]] = list()
+
+    def register(
+            self,
+            metric: M,
+    ) -> M:
+        """
+        Add metric family to the exposition
+            :param metric: Counter or Histogram instance
+            :return: Same metric
+        """
+
+        self._metrics.append(metric)
+        return metric
+
+    def register_gauges(
+            self,
+            prefix: str,
+            documentation: str,
+            callback: Callable[[], dict[str, float]],
+    ) -> None:
+        """
+        Export every value of the stats dict as a gauge (e.g. pool_stats, dispatcher stats) \n
+        Cumulative values (keys ending w/ _total) are exported as counters, _total suffix is reserved for them
+            :param prefix: Name prefix of the gauges
+            :param documentation: HELP line of the gauges
+            :param callback: Function which returns current stats
+        """
+
+        self._gauges.append((prefix, documentation, callback))
+
+    def render(self) -> str:
+        """
+        Render all metrics in OpenMetrics text format
+            :return: Exposition text
+        """
+
+        lines = list()
+
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        for prefix, documentation, callback in self._gauges:
+            for key, value in callback().items():
+                name, type_name = f"{prefix}_{key}", "gauge"
+
+                if key.endswith("_total"):
+                    name, type_name = name[:-len("_total")], "counter"
+
+                lines.append(f"# TYPE {name} {type_name}")
+                lines.append(f"# HELP {name} {_escape(documentation)}")
+                lines.append(f"{prefix}_{key} {value}")
+
+        lines.append("# EOF")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+listener_duration = registry.register(
+    Histogram(
+        name="dailynator_listener_duration_seconds",
+        documentation="Time spent in Bolt listeners",
+        labelnames=("listener",),
+    )
+)
+
+db_duration = registry.register(
+    Histogram(
+        name="dailynator_db_duration_seconds",
+        documentation="Time spent in Database methods",
+        labelnames=("method",),
+    )
+)
+
+slack_duration = registry.register(
+    Histogram(
+        name="dailynator_slack_api_duration_seconds",
+        documentation="Time spent in Slack Web API calls (rate limit waits & retries included)",
+        labelnames=("method",),
+    )
+)
+
+dailies_started = registry.register(
+    Counter(
+        name="dailynator_dailies_started",
+        documentation="Daily meetings started",
+        labelnames=("channel",),
+    )
+)
+
+answers_recorded = registry.register(
+    Counter(
+        name="dailynator_answers_recorded",
+        documentation="Daily answers recorded",
+        labelnames=("channel",),
+    )
+)
+
+reports_posted = registry.register(
+    Counter(
+        name="dailynator_reports_posted",
+        documentation="Daily reports posted",
+        labelnames=("channel",),
+    )
+)
+
+
+def timed(
+        histogram: Histogram,
+        **labels: str,
+) -> Callable[[F], F]:
+    """
+    Observe duration of every call of the coroutine function
+        :param histogram: Histogram instance
+        :param labels: Label values
+        :return: Decorator
+    """
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return await func(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def instrument_listener(
+        func: F,
+) -> F:
+    """
+    Observe duration of the listener (Bolt resolves arguments of the wrapped function)
+        :param func: Listener coroutine function
+        :return: Wrapped listener
+    """
+
+    return timed(listener_duration, listener=func.__name__)(func)
+
+
+def instrument_methods(
+        histogram: Histogram,
+) -> Callable[[type], type]:
+    """
+    Observe duration of every public coroutine method of the class
+        :param histogram: Histogram w/ single "method" label
+        :return: Class decorator
+    """
+
+    def decorator(cls: type) -> type:
+        for name, attr in list(vars(cls).items()):
+            if not name.startswith("_") and iscoroutinefunction(attr):
+                setattr(cls, name, timed(histogram, method=name)(attr))
+
+        return cls
+
+    return decorator
+
+
+async def metrics_handler(
+        request: web.Request,
+) -> web.Response:
+    return web.Response(
+        body=registry.render().encode(),
+        headers={"Content-Type": CONTENT_TYPE},
+    )
+
+
+async def start_metrics_server(
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+) -> Optional[web.AppRunner]:
+    """
+    Serve /metrics on a local HTTP endpoint (METRICS_HOST & METRICS_PORT, port is shifted by worker index)
+        :param host: Bind host (overrides METRICS_HOST)
+        :param port: Bind port (overrides METRICS_PORT, 0 disables the endpoint)
+        :return: Runner or None if endpoint is disabled
+    """
+
+    from src.sharding import worker_index
+
+    port = int(getenv("METRICS_PORT", 9100)) if port is None else port
+
+    if not port:
+        return None
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics_handler)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+
+    await web.TCPSite(
+        runner,
+        host or getenv("METRICS_HOST", "127.0.0.1"),
+        port + worker_index,
+    ).start()
+
+    return runner
@@ -1,6 +1,8 @@
 """Database schemes"""
 
-from sqlalchemy import Column, String, ForeignKey, Integer, Boolean
+from sqlalchemy import DDL, event
+from sqlalchemy import Column, String, ForeignKey, Integer, BigInteger, Boolean, Date, DateTime, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -37,6 +39,18 @@ class Channels(Base):  # noqa
         String(),
     )
 
+    # Moment of the last cron change (workers resync their schedules only if it changed)
+    cron_updated_at = Column(
+        "cron_updated_at",
+        DateTime(timezone=True),
+    )
+
+    # Minutes to buffer finished reports before posting them as a single digest (None posts every report at once)
+    digest_window = Column(
+        "digest_window",
+        Integer(),
+    )
+
 
 class Users(Base):  # noqa
     __tablename__ = "users"  # noqa
@@ -60,8 +74,9 @@ class Users(Base):  # noqa
     )
 
     main_channel_id = Column(
-        ForeignKey("channels.channel_id"),
+        ForeignKey("channels.channel_id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     real_name = Column(
@@ -73,6 +88,10 @@ class Users(Base):  # noqa
 
 class Questions(Base):  # noqa
     __tablename__ = "questions"  # noqa
+    __table_args__ = (
+        # Ordered scans of channel questions
+        Index("ix_questions_channel_id_id", "channel_id", "id"),
+    )
 
     id = Column(
         "id",
@@ -82,7 +101,7 @@ class Questions(Base):  # noqa
 
     channel_id = Column(
         "channel_id",
-        ForeignKey("channels.channel_id"),
+        ForeignKey("channels.channel_id", ondelete="CASCADE"),
         nullable=False,
     )
 
@@ -104,14 +123,16 @@ class Answers(Base):  # noqa
 
     user_id = Column(
         "user_id",
-        ForeignKey("users.user_id"),
+        ForeignKey("users.user_id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     question_id = Column(
         "question_id",
-        ForeignKey("questions.id"),
+        ForeignKey("questions.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     answer = Column(
@@ -132,8 +153,9 @@ class Attachments(Base):  # noqa
 
     answer_id = Column(
         "answer_id",
-        ForeignKey("answers.id"),
+        ForeignKey("answers.id", ondelete="CASCADE"),
         nullable=False,
+        index=True,
     )
 
     attachment = Column(
@@ -154,6 +176,134 @@ class Daily(Base):  # noqa
 
     user_id = Column(
         "user_id",
-        ForeignKey("users.user_id"),
+        ForeignKey("users.user_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+
+class DailyRuns(Base):  # noqa
+    __tablename__ = "daily_runs"  # noqa
+
+    job_id = Column(
+        "job_id",
+        String(),
+        primary_key=True,
+    )
+
+    fired_at = Column(
+        "fired_at",
+        DateTime(timezone=True),
+        primary_key=True,
+    )
+
+
+class DigestReports(Base):  # noqa
+    """
+    Finished reports waiting for the channel digest
+    """
+
+    __tablename__ = "digest_reports"  # noqa
+
+    id = Column(
+        "id",
+        Integer(),
+        primary_key=True,
+    )
+
+    channel_id = Column(
+        "channel_id",
+        ForeignKey("channels.channel_id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    user_id = Column(
+        "user_id",
+        String(20),
+        nullable=False,
+    )
+
+    # Digest window starts w/ the first buffered report
+    created_at = Column(
+        "created_at",
+        DateTime(timezone=True),
         nullable=False,
+        server_default=func.now(),
     )
+
+    # Set while a worker is posting the report (expired claims are taken over)
+    claimed_at = Column(
+        "claimed_at",
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    answers = Column(
+        "answers",
+        JSONB(),
+        nullable=False,
+    )
+
+
+class Reports(Base):  # noqa
+    """
+    Append-only archive of posted reports \n
+    Range partitioned by month on report_date (partitions are named reports_YYYY_MM, old ones are dropped whole)
+    """
+
+    __tablename__ = "reports"  # noqa
+    __table_args__ = (
+        Index("ix_reports_channel_id_report_date", "channel_id", "report_date"),
+        Index("ix_reports_user_id_report_date", "user_id", "report_date"),
+        {"postgresql_partition_by": "RANGE (report_date)"},
+    )
+
+    # Sequence default (identity columns aren't supported by partitioned tables before Postgres 17)
+    id = Column(
+        "id",
+        BigInteger(),
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    # Partition key has to be a part of the primary key
+    report_date = Column(
+        "report_date",
+        Date(),
+        primary_key=True,
+    )
+
+    # No FKs, archive outlives channels & users
+    channel_id = Column(
+        "channel_id",
+        String(20),
+        nullable=False,
+    )
+
+    user_id = Column(
+        "user_id",
+        String(20),
+        nullable=False,
+    )
+
+    created_at = Column(
+        "created_at",
+        DateTime(timezone=True),
+        nullable=False,
+        server_default=func.now(),
+    )
+
+    answers = Column(
+        "answers",
+        JSONB(),
+        nullable=False,
+    )
+
+
+# Rows w/o monthly partition are kept in the default one (monthly partitions are created ahead by maintenance job)
+event.listen(
+    Reports.__table__,
+    "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS reports_default PARTITION OF reports DEFAULT"),
+)
@@ -0,0 +1,129 @@
+"""Cached directory of Slack user profiles"""
+
+from asyncio import Future, get_running_loop, wait
+from os import getenv
+from typing import NamedTuple
+
+from slack_sdk.web.async_client import AsyncWebClient
+
+from src.cache import TTLCache, MISSING
+
+
+class UserProfile(NamedTuple):
+    """
+    Fields of users.info response used by the bot
+    """
+
+    user_id: str
+    real_name: str
+    tz: str
+    image_48: str
+    is_bot: bool
+
+
+profile_cache = TTLCache(
+    maxsize=int(getenv("PROFILE_CACHE_SIZE", 10000)),
+    ttl=float(getenv("PROFILE_CACHE_TTL", 3600)),
+)
+
+# Pending users.info requests (concurrent misses for the same user share one request)
+_pending_requests: dict[str, Future] = dict()
+
+
+def profile_from_user(
+        user: dict,
+) -> UserProfile:
+    """
+    Converts Slack user object to a profile
+        :param user: User object from users.info or user_change event
+        :return: UserProfile instance
+    """
+
+    return UserProfile(
+        user_id=user["id"],
+        real_name=user.get("real_name") or user.get("profile", {}).get("real_name", ""),
+        tz=user.get("tz") or "UTC",
+        image_48=user.get("profile", {}).get("image_48", ""),
+        is_bot=user.get("is_bot", False) or user["id"] == "USLACKBOT",
+    )
+
+
+async def get_user_profile(
+        client: AsyncWebClient,
+        user_id: str,
+) -> UserProfile:
+    """
+    Get user profile from cache or users.info on cache miss
+        :param client: AsyncWebClient instance
+        :param user_id: Slack user id
+        :return: UserProfile instance
+    """
+
+    profile = profile_cache.get(user_id)
+
+    if profile is not MISSING:
+        return profile
+
+    # Wait for the request which is already in flight (cancelled waiter doesn't cancel it for others)
+    pending = _pending_requests.get(user_id)
+
+    if pending is not None:
+        await wait((pending,))
+
+        # Task which made the request was cancelled, request the profile again
+        if pending.cancelled():
+            return await get_user_profile(
+                client=client,
+                user_id=user_id,
+            )
+
+        return pending.result()
+
+    pending = get_running_loop().create_future()
+    _pending_requests[user_id] = pending
+
+    try:
+        profile = profile_from_user(
+            (
+                await client.users_info(
+                    user=user_id,
+                )
+            )["user"]
+        )
+    except Exception as e:
+        pending.set_exception(e)
+
+        # Mark exception as retrieved if nobody else waits for it
+        pending.exception()
+        raise
+    else:
+        profile_cache.set(user_id, profile)
+        pending.set_result(profile)
+    finally:
+        del _pending_requests[user_id]
+
+        # Request was cancelled (e.g. on shutdown), release waiters
+        if not pending.done():
+            pending.cancel()
+
+    return profile
+
+
+def update_user_profile(
+        user: dict,
+) -> None:
+    """
+    Replace cached profile w/ the user object received in user_change event
+        :param user: Slack user object
+    """
+
+    profile_cache.set(user["id"], profile_from_user(user))
+
+
+def profile_cache_stats() -> dict[str, int]:
+    """
+    Get profile cache hit/miss counters
+        :return: Dict w/ hits, misses, evictions and current size
+    """
+
+    return profile_cache.stats()
@@ -1,12 +1,86 @@
 """Utils for posting and collecting reports"""
 
-from typing import Sequence
-from slack_sdk.models.attachments import BlockAttachment
+from os import getenv
+from typing import Optional, Sequence
 from slack_sdk.web.async_client import AsyncWebClient
 from asyncio import gather
 
-from src.block_kit import error_block
+from src.block_kit import error_block, BlockDict
+from src.cache import TTLCache, MISSING
 from src.db import Database
+from src.dispatcher import bulk_priority
+from src.metrics import dailies_started, reports_posted
+
+# Max number of users in a single dnd.teamInfo request
+DND_BATCH_SIZE = 50
+
+# User id -> in-progress report: (question position, rendered attachment or None if skipped) for every answer
+report_drafts = TTLCache(
+    maxsize=int(getenv("REPORT_DRAFT_CACHE_SIZE", 10000)),
+    ttl=float(getenv("REPORT_DRAFT_TTL", 86400)),
+)
+
+
+def add_report_attachment(
+        user_id: str,
+        position: Optional[int],
+        attachment: Optional[BlockDict],
+) -> None:
+    """
+    Add rendered answer to the user's in-progress report (report is started over on the first question)
+        :param user_id: Slack user id
+        :param position: Position of the answered question in the question set (None if question was deleted)
+        :param attachment: Rendered report attachment (None if answer is skipped)
+    """
+
+    draft = report_drafts.get(user_id)
+
+    if draft is MISSING or position == 0:
+        draft = list()
+
+    draft.append((position, attachment))
+
+    report_drafts.set(user_id, draft)
+
+
+def is_report_draft_complete(
+        user_id: str,
+        position: int,
+) -> bool:
+    """
+    Check if user's in-progress report holds answers on all questions before the given one
+        :param user_id: Slack user id
+        :param position: Position of the question being answered
+        :return: True if report can be finished from memory else False
+    """
+
+    # Report of the first question starts over anyway
+    if not position:
+        return True
+
+    draft = report_drafts.get(user_id)
+
+    return draft is not MISSING and [draft_position for draft_position, _ in draft] == list(range(position))
+
+
+def pop_report_draft(
+        user_id: str,
+        questions_length: int,
+) -> Optional[list[BlockDict]]:
+    """
+    Take user's finished report from memory
+        :param user_id: Slack user id
+        :param questions_length: Number of questions in the question set
+        :return: List of attachments or None if the draft is incomplete (restart, other replica, questions changed)
+    """
+
+    draft = report_drafts.get(user_id)
+    report_drafts.invalidate(user_id)
+
+    if draft is MISSING or [position for position, _ in draft] != list(range(questions_length)):
+        return None
+
+    return [attachment for _, attachment in draft if attachment is not None]
 
 
 async def post_report(
@@ -14,7 +88,7 @@ async def post_report(
         db_connection: Database,
         channel: str,
         user_id: str,
-        attachments: Sequence[BlockAttachment],
+        attachments: Sequence[BlockDict],
         username: str,
         icon_url: str,
 ) -> None:
@@ -29,8 +103,6 @@ async def post_report(
         :param icon_url: Custom icon url
     """
 
-    from os import getenv
-
     # Collect kwargs from params
     kwargs = dict()
     kwargs["channel"] = channel
@@ -40,24 +112,86 @@ async def post_report(
     kwargs["icon_url"] = icon_url
     kwargs["icon_emoji"] = None
 
-    # Parse emoji if USE_AVATARS is set to False
+    # Choose random emoji if USE_AVATARS is set to False
     if getenv("USE_AVATARS").lower() == "false":
-        from src.utils import parse_emoji_list
-        from random import choice
+        from src.emoji_catalog import emoji_catalog
 
-        # Parse emoji list
-        emoji_list = await parse_emoji_list(app=app)
-        # Choose random emoji
-        kwargs["icon_emoji"] = choice(emoji_list)
+        # Emoji list is loaded once per workspace
+        kwargs["icon_emoji"] = await emoji_catalog.random_emoji(
+            client=app,
+        )
 
     message_response = await app.chat_postMessage(**kwargs)
 
+    reports_posted.inc(channel=channel)
+
     await db_connection.write_daily_ts(
         ts=message_response["ts"],
         user_id=user_id,
     )
 
 
+async def filter_users_not_in_dnd(
+        client: AsyncWebClient,
+        team_id: str,
+        user_ids: list[str],
+        batch_size: int = DND_BATCH_SIZE,
+) -> list[str]:
+    """
+    Get users whose next DND period hasn't started yet (DND info is requested in batches via dnd.teamInfo)
+        :param client: AsyncWebClient instance
+        :param team_id: Slack workspace team id
+        :param user_ids: List of Slack user ids
+        :param batch_size: Max number of users per dnd.teamInfo request
+        :return: List of users available for the daily
+    """
+
+    from time import time
+
+    async def get_dnd_batch(
+            user_batch: list[str],
+    ) -> dict[str, dict]:
+        """
+        Wrapper for async requesting DND info of the batch of users
+            :param user_batch: List of Slack user ids
+            :return: Dict w/ DND info by user id
+        """
+
+        return (
+            await client.dnd_teamInfo(
+                team_id=team_id,
+                users=",".join(user_batch),
+            )
+        )["users"]
+
+    async_tasks = list()
+
+    for batch_start in range(0, len(user_ids), batch_size):
+        async_tasks.append(
+            get_dnd_batch(
+                user_batch=user_ids[batch_start:batch_start + batch_size],
+            )
+        )
+
+    # Serve interactive calls first
+    with bulk_priority():
+        dnd_batches = await gather(*async_tasks)
+
+    dnd_info = dict()
+
+    for dnd_batch in dnd_batches:
+        dnd_info.update(dnd_batch)
+
+    # DND timestamps are absolute, so all users are compared w/ the same current timestamp (no tz conversion needed)
+    time_now = time()
+
+    return [
+        user_id
+        for user_id in user_ids
+        if time_now < dnd_info.get(user_id, {}).get("next_dnd_start_ts", float("inf"))
+    ]
+
+
 async def start_daily(
         channel_id: str,
 ) -> None:
@@ -70,8 +204,9 @@ async def start_daily(
     from src.block_kit import start_daily_block
     from main import app
 
-    from datetime import datetime
-    from zoneinfo import ZoneInfo
+    from datetime import datetime, timezone
+    from src.utils import get_job_id
+    from src.sharding import scheduled_fire_time
 
     db = Database()
 
@@ -80,59 +215,15 @@ async def start_daily(
         channel_id=channel_id,
     )
 
-    # Get raw user_list
-    raw_user_list = await db.get_all_users_by_channel_id(
-        channel_id=channel_id,
-    )
-
-    # Check users DND status
-    user_list = list()
-
-    async def check_user_dnd_status(
-            user_id: str,
-    ) -> None:
-        """
-        Checks user DND status by comparing next dnd start timestamp with time aware datetime on the machine
-            :param user_id: Slack user id
-        """
-
-        user_next_dnd_start = (
-            await app.client.dnd_info(
-                team_id=team_id,
-                user=user_id,
-            )
-        )["next_dnd_start_ts"]
-
-        user_tz = (
-            await app.client.users_info(
-                user=user_id,
-            )
-        )["user"]["tz"]
-
-        # Get user's current offset-aware datetime
-        user_dnd_start_aware = datetime.fromtimestamp(
-            user_next_dnd_start,
-            tz=ZoneInfo(key=user_tz),
-        )
-
-        # Get current offset-aware datetime
-        time_now_aware = datetime.now().astimezone()
-
-        if time_now_aware < user_dnd_start_aware:
-            user_list.append(
-                user_id
-            )
-
-    async_tasks = list()
+    # Lease is keyed on scheduled fire time, so late starts claim the same run as /skip_daily & other workers
+    fired_at = scheduled_fire_time.get() or datetime.now(tz=timezone.utc).replace(second=0, microsecond=0)
 
-    for user in raw_user_list:
-        async_tasks.append(
-            check_user_dnd_status(
-                user_id=user,
-            )
-        )
-
-    await gather(*async_tasks)
+    # Exit if the daily was already started by another worker or skipped
+    if not await db.claim_daily_run(
+            job_id=get_job_id(team_id=team_id, channel_id=channel_id),
+            fired_at=fired_at.astimezone(tz=timezone.utc),
+    ):
+        return
 
     # Get first question
     first_question, first_question_idx = await db.get_first_question(
@@ -152,25 +243,6 @@ async def start_daily(
 
         return
 
-    async def start_setup_daily(
-            user_id: str,
-    ) -> None:
-        """
-        Wrapper for async setting necessary field in database and deleting old answers if still present
-            :param user_id: Slack user id
-        """
-
-        # Set user daily status & delete user's old idx
-        await db.start_user_daily_status(
-            user_id=user_id,
-            q_idx=first_question_idx,
-        )
-
-        # Delete old user's answers from Redis
-        await db.delete_user_answers(
-            user_id=user_id,
-        )
-
     async def post_first_question(
             user_id: str,
     ) -> None:
@@ -198,24 +270,38 @@ async def start_daily(
             ),
         )
 
-    async_tasks_primary = list()
-    async_tasks_secondary = list()
-
-    for user in user_list:
-        async_tasks_primary.append(
-            start_setup_daily(
-                user_id=user,
-            )
+    dailies_started.inc(channel=channel_id)
+
+    # Handle users batch by batch (memory is bounded by DB_STREAM_BATCH_SIZE)
+    async for raw_user_list in db.iter_users_by_channel_id(
+            channel_id=channel_id,
+    ):
+        # Check users DND status
+        user_list = await filter_users_not_in_dnd(
+            client=app.client,
+            team_id=team_id,
+            user_ids=raw_user_list,
         )
 
-        async_tasks_secondary.append(
-            post_first_question(
-                user_id=user,
+        async_tasks = list()
+
+        for user in user_list:
+            async_tasks.append(
+                post_first_question(
+                    user_id=user,
+                )
             )
-        )
 
-    # Update all necessary statuses at once
-    await gather(*async_tasks_primary)
+        # Drop unfinished reports of the previous daily
+        for user in user_list:
+            report_drafts.invalidate(user)
+
+        # Set daily status, first question idx & delete old answers of all users in the batch at once
+        await db.start_users_daily(
+            user_ids=user_list,
+            q_idx=first_question_idx,
+        )
 
-    # Post all DMs at once
-    await gather(*async_tasks_secondary)
+        # Post all DMs at once (interactive calls are served first)
+        with bulk_priority():
+            await gather(*async_tasks)
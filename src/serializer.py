@@ -0,0 +1,56 @@
+"""Keyed serialization of concurrent handlers"""
+
+from __future__ import annotations
+
+from asyncio import Lock
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable
+
+
+class KeyedSerializer:
+    """
+    One async lane per key: calls w/ the same key run one by one in arrival order,
+    calls w/ different keys run concurrently
+    """
+
+    def __init__(
+            self,
+    ) -> None:
+        # Lock & number of holders/waiters of every active lane (idle lanes are dropped)
+        self._lanes: dict[Hashable, tuple[Lock, int]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._lanes)
+
+    @asynccontextmanager
+    async def lane(
+            self,
+            key: str,
+    ) -> AsyncIterator[None]:
+        """
+        Wait for previous calls w/ the same key to finish
+            :param key: Lane key (e.g. Slack user id)
+        """
+
+        lock, users = self._lanes.get(key, (None, 0))
+
+        if lock is None:
+            lock = Lock()
+
+        self._lanes[key] = (lock, users + 1)
+
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._lanes[key]
+
+            if users == 1:
+                del self._lanes[key]
+            else:
+                self._lanes[key] = (lock, users - 1)
+
+
+# DM answers of a user are recorded one by one
+# (between bot replicas answers are ordered by record_user_answer's cursor check)
+dm_serializer = KeyedSerializer()
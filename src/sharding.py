@@ -0,0 +1,57 @@
+"""Channel sharding between bot worker processes"""
+
+from contextvars import ContextVar
+from datetime import datetime
+from os import getenv
+from typing import Optional
+from zlib import crc32
+
+from apscheduler.executors.asyncio import AsyncIOExecutor
+
+# Number of bot worker processes & index of the current one
+worker_count = max(int(getenv("BOT_WORKERS", 1)), 1)
+worker_index = int(getenv("BOT_WORKER_INDEX", 0))
+
+
+def get_worker_index(
+        job_id: str,
+) -> int:
+    """
+    Get index of the worker which owns the job (stable across processes & restarts)
+        :param job_id: Scheduler job id (team_id_channel_id)
+        :return: Worker index
+    """
+
+    return crc32(job_id.encode()) % worker_count
+
+
+def owns_job(
+        job_id: str,
+) -> bool:
+    """
+    Check if the job has to be scheduled by the current worker
+        :param job_id: Scheduler job id (team_id_channel_id)
+        :return: True if job belongs to the current worker else False
+    """
+
+    return get_worker_index(job_id) == worker_index
+
+
+# Scheduled fire time of the running job (same for all workers, unlike the moment the job actually starts)
+scheduled_fire_time: ContextVar[Optional[datetime]] = ContextVar("scheduled_fire_time", default=None)
+
+
+class FireTimeExecutor(AsyncIOExecutor):
+    """
+    AsyncIOExecutor which exposes scheduled fire time to coroutine jobs via scheduled_fire_time \n
+    Job task is created inside the executor call, so it copies the context w/ the fire time set
+    """
+
+    def _do_submit_job(self, job, run_times):
+        # Coalesced jobs get the latest missed run time only
+        token = scheduled_fire_time.set(run_times[-1])
+
+        try:
+            super()._do_submit_job(job, run_times)
+        finally:
+            scheduled_fire_time.reset(token)
@@ -1,102 +1,322 @@
 """Util functions for all kind of situations"""
 from __future__ import annotations
 
-from slack_sdk.web.async_slack_response import AsyncSlackResponse
 from slack_sdk.web.async_client import AsyncWebClient
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime
+from functools import lru_cache
+from os import getenv
+from typing import AsyncIterator, Optional
 
 from src.db import Database
 from src.block_kit import error_block
+from src.profiles import get_user_profile, UserProfile
+from src.dispatcher import bulk_priority
+from src.sharding import owns_job, worker_count
 
 default_colors = ["#e8aeb7", "#b8e1ff", "#3c7a89", "#82aba1", "#f4d06f"]
 skip_question_list = ["-", "nil", "none", "null"]
 
+# conversations.members page size & max number of concurrent profile lookups
+members_page_size = 200
+members_resolve_concurrency = 20
 
-async def parse_emoji_list(
-        app: AsyncWebClient,
-) -> list[str]:
+# Digit to slack emoji translation table
+digit_emoji_table = str.maketrans(
+    {
+        str(digit): f":{name}:"
+        for digit, name in enumerate(
+            ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine"]
+        )
+    }
+)
+index_emoji_cache_size = 1024
+
+
+def get_job_id(
+        team_id: str,
+        channel_id: str,
+) -> str:
     """
-    Returns a list of emoji names
-        :param app: App instance
-        :return: List of all emoji names
+    Get scheduler job id of the channel
+        :param team_id: Slack workspace team id
+        :param channel_id: Slack channel id
+        :return: Job id
     """
 
-    emoji_r: AsyncSlackResponse = await app.emoji_list()
-    return list(emoji_r.data.get("emoji", {':+1:'}).keys())
+    return f"{team_id}_{channel_id}"
 
 
-async def start_cron(
+def schedule_channel(
+        channel_id: str,
+        team_id: str,
+        cron: str,
+        cron_tz: str,
+) -> None:
+    """
+    Add or replace channel's daily job (crontab is stored as job name to detect changes w/o parsing) \n
+    Job is removed instead if the channel belongs to another worker
+        :param channel_id: Slack channel id
+        :param team_id: Slack workspace team id
+        :param cron: Daily meeting cron
+        :param cron_tz: Cron timezone
+    """
+
+    from main import scheduler
+    from zoneinfo import ZoneInfo
+
+    # Leave the job to its owner
+    if not owns_job(job_id=get_job_id(team_id=team_id, channel_id=channel_id)):
+        unschedule_channel(
+            channel_id=channel_id,
+            team_id=team_id,
+        )
+        return
+
+    # Get an instance of CronTrigger
+    cron_trigger = CronTrigger().from_crontab(
+        expr=cron,
+        timezone=ZoneInfo(key=cron_tz),
+    )
+
+    # Schedule a job (function is referenced by name so the job can be persisted)
+    scheduler.add_job(
+        func="src.report:start_daily",
+        kwargs=dict(channel_id=channel_id),  # Supply channel_id to start_daily
+        trigger=cron_trigger,
+        id=get_job_id(team_id=team_id, channel_id=channel_id),
+        name=f"{cron} {cron_tz}",
+        coalesce=True,
+        replace_existing=True,
+    )
+
+
+def unschedule_channel(
+        channel_id: str,
+        team_id: str,
+) -> None:
+    """
+    Remove channel's daily job if present
+        :param channel_id: Slack channel id
+        :param team_id: Slack workspace team id
+    """
 
+    from main import scheduler
+
+    job_id = get_job_id(team_id=team_id, channel_id=channel_id)
+
+    if scheduler.get_job(job_id=job_id):
+        scheduler.remove_job(job_id=job_id)
+
+
+async def reschedule_channel(
+        channel_id: str,
 ) -> None:
     """
-    Adds cron triggered jobs to default async job store
+    Update the daily job of a single channel w/ its current cron from database
+        :param channel_id: Slack channel id
+    """
+
+    db = Database()
+
+    team_id, cron, cron_tz = await db.get_channel_schedule(
+        channel_id=channel_id,
+    )
+
+    if not team_id:
+        return
+
+    if not cron:
+        unschedule_channel(
+            channel_id=channel_id,
+            team_id=team_id,
+        )
+        return
+
+    schedule_channel(
+        channel_id=channel_id,
+        team_id=team_id,
+        cron=cron,
+        cron_tz=cron_tz,
+    )
+
+
+# Fingerprint of channel schedules at the last sync w/ the job store
+cron_fingerprint: Optional[tuple[int, Optional[datetime]]] = None
+
+
+async def start_cron(
+        notify_missing: bool = True,
+) -> None:
+    """
+    Sync persistent job store w/ cron of the channels owned by this worker (only new or changed crontabs are parsed)
+        :param notify_missing: Notify channels w/o cron
     """
 
-    from functools import partial
-    from apscheduler.triggers.cron import CronTrigger
     from main import scheduler, app
-    from src.report import start_daily
-    from src.db import Database
-    from zoneinfo import ZoneInfo
+
+    global cron_fingerprint
 
     db = Database()
 
-    # Get current cron as str
-    cron_list = await db.get_all_cron_with_channels()
-
-    for channel_id, team_id, cron, cron_tz in cron_list:
-        # Skip if cron not set
-        if not cron:
-            await app.client.chat_postMessage(
-                channel=channel_id,
-                text=":x: No scheduler was added",
-                blocks=error_block(
-                    header_text="No scheduler was added",
-                    body_text="Use this to add schedule\n`/cron <* * * * *>`",
-                ),
+    # Taken before streaming, so changes made meanwhile trigger another sync
+    cron_fingerprint = await db.get_cron_fingerprint()
+
+    # Start Async scheduler (loads persisted jobs)
+    if not scheduler.state:
+        scheduler.start()
+
+    stored_jobs = dict()
+
+    for job in scheduler.get_jobs(jobstore="default"):
+        if job.func_ref == "src.report:start_daily":
+            stored_jobs[job.id] = job.name
+        else:
+            # Periodic & digest jobs persisted by previous versions (digests are flushed by flush_digests now)
+            scheduler.remove_job(job_id=job.id, jobstore="default")
+    channel_jobs = set()
+
+    # Read channels w/ cron in batches
+    async for cron_list in db.iter_all_cron_with_channels():
+        for channel_id, team_id, cron, cron_tz in cron_list:
+            job_id = get_job_id(team_id=team_id, channel_id=channel_id)
+
+            # Skip channels of other workers
+            if not owns_job(job_id=job_id):
+                continue
+
+            # Skip if cron not set
+            if not cron:
+                if not notify_missing:
+                    continue
+
+                await app.client.chat_postMessage(
+                    channel=channel_id,
+                    text=":x: No scheduler was added",
+                    blocks=error_block(
+                        header_text="No scheduler was added",
+                        body_text="Use this to add schedule\n`/cron <* * * * *>`",
+                    ),
+                )
+
+                continue
+
+            channel_jobs.add(job_id)
+
+            # Skip if stored job is up-to-date
+            if stored_jobs.get(job_id) == f"{cron} {cron_tz}":
+                continue
+
+            schedule_channel(
+                channel_id=channel_id,
+                team_id=team_id,
+                cron=cron,
+                cron_tz=cron_tz,
             )
 
-            return
+    # Remove jobs of unsubscribed channels & channels of other workers
+    for job_id in stored_jobs.keys() - channel_jobs:
+        scheduler.remove_job(job_id=job_id)
 
-        # Get an instance of CronTrigger
-        cron_trigger = CronTrigger().from_crontab(
-            expr=cron,
-            timezone=ZoneInfo(key=cron_tz),
+    # Keep partitions of the reports archive (a single worker maintains it)
+    if notify_missing and owns_job(job_id="maintain_report_archive"):
+        await maintain_report_archive()
+
+        scheduler.add_job(
+            func="src.utils:maintain_report_archive",
+            trigger=CronTrigger(hour=0, minute=5, timezone="UTC"),
+            id="maintain_report_archive",
+            jobstore="internal",
+            coalesce=True,
+            replace_existing=True,
         )
 
-        # Schedule a job
+    # Post channel digests whose window has ended (every worker posts digests of its own channels)
+    if notify_missing:
         scheduler.add_job(
-            func=partial(start_daily, channel_id=channel_id),  # Supply channel_id to start_daily
-            trigger=cron_trigger,
-            id=f"{team_id}_{channel_id}",
+            func="src.digest:flush_digests",
+            trigger="interval",
+            seconds=int(getenv("DIGEST_FLUSH_INTERVAL", 60)),
+            id="flush_digests",
+            jobstore="internal",
+            coalesce=True,
             replace_existing=True,
         )
 
-    # Start Async scheduler
-    if not scheduler.state:
-        scheduler.start()
+    # Pick up cron changes received by other workers
+    if worker_count > 1:
+        scheduler.add_job(
+            func="src.utils:sync_cron",
+            trigger="interval",
+            seconds=int(getenv("SCHEDULER_SYNC_INTERVAL", 60)),
+            id="sync_cron",
+            jobstore="internal",
+            coalesce=True,
+            replace_existing=True,
+        )
+
+
+async def sync_cron() -> None:
+    """
+    Resync schedules w/ the database only if any channel cron changed since the last sync (a single aggregate query)
+    """
+
+    if await Database().get_cron_fingerprint() != cron_fingerprint:
+        await start_cron(
+            notify_missing=False,
+        )
+
+
+async def maintain_report_archive() -> None:
+    """
+    Create partitions of the reports archive ahead & drop ones older than retention period \n
+    REPORTS_PARTITIONS_AHEAD - upcoming months w/ partitions (Default: 2) \n
+    REPORTS_RETENTION_MONTHS - past months to keep (Default: 12, 0 keeps reports forever)
+    """
+
+    from logging import getLogger
+
+    db = Database()
+
+    created = await db.create_report_partitions(
+        months_ahead=int(getenv("REPORTS_PARTITIONS_AHEAD", 2)),
+    )
+
+    if created:
+        getLogger().info(f"Created report partitions: {', '.join(created)}")
+
+    retention_months = int(getenv("REPORTS_RETENTION_MONTHS", 12))
+
+    if not retention_months:
+        return
+
+    dropped = await db.drop_report_partitions(
+        retention_months=retention_months,
+    )
+
+    if dropped:
+        getLogger().info(f"Dropped report partitions: {', '.join(dropped)}")
 
 
 async def skip_cron(
         channel_id: str,
-) -> datetime:
+) -> Optional[datetime]:
     """
-    Skip next daily trigger time for specified channel
+    Skip next daily trigger time for specified channel \n
+    Lease of the skipped run is taken in advance, so it's skipped by whichever worker owns the job
 
     :param channel_id: Slack channel id
+    :return: Next fire time after the skipped one (None if schedule wasn't set)
     """
 
-    from functools import partial
-    from apscheduler.job import Job
-    from main import scheduler, app
-    from src.report import start_daily
-    from src.db import Database
+    from main import app
+    from zoneinfo import ZoneInfo
+    from datetime import timedelta, timezone
 
     db = Database()
 
     # Get channel cron and team_id
-    channel_cron, team_id = await db.get_cron_by_channel_id(
+    team_id, channel_cron, cron_tz = await db.get_channel_schedule(
         channel_id=channel_id,
     )
 
@@ -111,36 +331,35 @@ async def skip_cron(
             ),
         )
 
-    from datetime import timedelta
+        return None
 
-    # Get previous job's trigger
-    cron_job: Job = scheduler.get_job(
-        job_id=f"{team_id}_{channel_id}",
+    cron_trigger = CronTrigger().from_crontab(
+        expr=channel_cron,
+        timezone=ZoneInfo(key=cron_tz),
     )
 
-    cron_trigger: CronTrigger = cron_job.trigger
-
-    # Get previous job's next fire datetime
-    cron_trigger_next_fire_time = cron_trigger.get_next_fire_time(
-        previous_fire_time=cron_job.next_run_time,  # noqa
-        now=cron_job.next_run_time + timedelta(seconds=1),
+    # Get closest fire datetime
+    cron_trigger_skipped_fire_time = cron_trigger.get_next_fire_time(
+        previous_fire_time=None,
+        now=datetime.now(tz=ZoneInfo(key=cron_tz)),
     )
 
-    # Set new start time
-    cron_trigger.start_date = cron_trigger_next_fire_time
+    # Take the lease of the closest run which isn't skipped yet
+    while not await db.claim_daily_run(
+            job_id=get_job_id(team_id=team_id, channel_id=channel_id),
+            fired_at=cron_trigger_skipped_fire_time.astimezone(tz=timezone.utc),
+    ):
+        cron_trigger_skipped_fire_time = cron_trigger.get_next_fire_time(
+            previous_fire_time=cron_trigger_skipped_fire_time,
+            now=cron_trigger_skipped_fire_time + timedelta(seconds=1),
+        )
 
-    # Update a job w/ trigger w/ new start time
-    scheduler.add_job(
-        func=partial(start_daily, channel_id=channel_id),  # Supply channel_id to start_daily
-        trigger=cron_trigger,
-        id=f"{team_id}_{channel_id}",
-        replace_existing=True,
+    # Get next fire datetime after the skipped one
+    cron_trigger_next_fire_time = cron_trigger.get_next_fire_time(
+        previous_fire_time=cron_trigger_skipped_fire_time,
+        now=cron_trigger_skipped_fire_time + timedelta(seconds=1),
     )
 
-    # Start Async scheduler
-    if not scheduler.state:
-        scheduler.start()
-
     return cron_trigger_next_fire_time
 
 
@@ -177,110 +396,101 @@ async def is_dm_in_command(
     return False
 
 
-async def all_non_bot_members(
+async def iter_channel_members(
         client: AsyncWebClient,
         channel_id: str,
-) -> list[str]:
+        page_size: int = members_page_size,
+) -> AsyncIterator[list[str]]:
     """
-    Get all non bot members of the channel
+    Iterate over all pages of channel members following next_cursor
         :param client: AsyncWebClient instance
         :param channel_id: Slack channel id
-        :return: List of all non bot members
+        :param page_size: Max number of members per page
+        :return: Async iterator over pages of Slack user ids
     """
 
-    from asyncio import gather
+    cursor = None
 
-    # Parse all members except bots
-    raw_member_list = (
-        await client.conversations_members(
+    while True:
+        members_r = await client.conversations_members(
             channel=channel_id,
+            limit=page_size,
+            cursor=cursor,
         )
-    )["members"]
-
-    member_list = list()
 
-    async def check_member_is_bot(
-            user_id: str,
-    ) -> None:
-        """
-        Wrapper for async check if member is bot and populating member list
-            :param user_id: Slack channel id
-        """
-        if not (await client.users_info(user=user_id))["user"]["is_bot"]:
-            member_list.append(user_id)
+        yield members_r["members"]
 
-    async_tasks = list()
+        cursor = (members_r.get("response_metadata") or {}).get("next_cursor")
 
-    for member in raw_member_list:
-        async_tasks.append(
-            check_member_is_bot(
-                user_id=member,
-            )
-        )
-
-    await gather(*async_tasks)
-
-    return member_list
+        # Last page has empty cursor
+        if not cursor:
+            return
 
 
-async def create_user_with_real_name(
+async def iter_non_bot_members(
         client: AsyncWebClient,
-        db_connection: Database,
-        user_id: str,
         channel_id: str,
-) -> None:
+        concurrency: int = members_resolve_concurrency,
+) -> AsyncIterator[list[UserProfile]]:
     """
-    Wrapper for async creating new user in database w/ real_name
-        :param client: ASyncWebClient instance
-        :param db_connection: Database connection instance
-        :param user_id: Slack user id
+    Iterate over pages of channel members' profiles w/o bots
+        :param client: AsyncWebClient instance
         :param channel_id: Slack channel id
+        :param concurrency: Max number of concurrent profile lookups
+        :return: Async iterator over pages of non bot profiles
     """
 
-    real_name = (
-        await client.users_info(
-            user=user_id,
-        )
-    )["user"]["real_name"]
-
-    await db_connection.create_user(
-        user_id=user_id,
-        daily_status=False,
-        q_idx=0,
-        main_channel_id=channel_id,
-        real_name=real_name,
-    )
+    from asyncio import gather, Semaphore
+
+    semaphore = Semaphore(concurrency)
 
+    async def resolve_member(
+            user_id: str,
+    ) -> UserProfile:
+        """
+        Wrapper for async bounded profile lookup
+            :param user_id: Slack user id
+            :return: UserProfile instance
+        """
 
-async def create_multiple_user_with_real_name(
+        async with semaphore:
+            return await get_user_profile(
+                client=client,
+                user_id=user_id,
+            )
+
+    async for member_page in iter_channel_members(
+            client=client,
+            channel_id=channel_id,
+    ):
+        # Serve interactive calls first
+        with bulk_priority():
+            profiles = await gather(*[resolve_member(user_id=member) for member in member_page])
+
+        yield [profile for profile in profiles if not profile.is_bot]
+
+
+async def sync_channel_members(
         client: AsyncWebClient,
         db_connection: Database,
         channel_id: str,
-        member_list: list[str],
 ) -> None:
     """
-    Create lots new users in database w/ real_name
-        :param client: AsyncWebClient
+    Create or update all non bot members of the channel page by page (memory is bounded by the page size)
+        :param client: AsyncWebClient instance
         :param db_connection: Database connection instance
         :param channel_id: Slack channel id
-        :param member_list: List of users to be created
     """
 
-    from asyncio import gather
-    async_tasks = list()
-
-    for user in member_list:
-        async_tasks.append(
-            create_user_with_real_name(
-                client=client,
-                db_connection=db_connection,
-                user_id=user,
-                channel_id=channel_id,
-            )
+    async for profiles in iter_non_bot_members(
+            client=client,
+            channel_id=channel_id,
+    ):
+        await db_connection.bulk_upsert_users(
+            main_channel_id=channel_id,
+            users=[(profile.user_id, profile.real_name) for profile in profiles],
         )
 
-    await gather(*async_tasks)
-
 
 async def notify_not_subscribed(
         client: AsyncWebClient,
@@ -333,20 +543,14 @@ async def is_not_subscribed(
     return False
 
 
+@lru_cache(maxsize=index_emoji_cache_size)
 def int_to_slack_emoji(
         num: int,
-) -> str | list[str]:
+) -> str:
     """
-    Converts an integer to a slack emojis form
+    Converts an integer to a slack emojis form (cached, indexes of lists are the same on every render)
         :param num: The integer to convert
         :return: The emoji form of specified integer
     """
 
-    emoji_list = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten"]
-
-    words = []
-
-    for unit in str(num):
-        words.append(":" + emoji_list[int(unit)] + ":")
-
-    return "".join(words)
+    return str(num).translate(digit_emoji_table)